@@ -0,0 +1,364 @@
+"""Benchmarks for the hot paths of the game modules and wizcoin.
+Every benchmark builds its inputs from a fixed seed and feeds interactive
+functions canned input, so runs can be compared with each other. For each
+benchmark this reports operations per second, the peak memory traced by
+tracemalloc while running a batch of operations, and the memory blocks
+still allocated afterwards.
+
+    python benchmarks.py                          Run everything.
+    python benchmarks.py wizcoin --json out.json  Run matching benchmarks, save JSON.
+    python benchmarks.py --compare before.json    Show speedups against an older run."""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import fourinarow
+import tictactoe
+import tictactoe_oop
+import towerofhanoi
+import wizcoin
+import wizcoin_array
+
+SEED = 0
+MIN_TIME = 0.2  # Seconds each timed batch should take at least.
+REPEATS = 3  # Timed batches per benchmark; the fastest one is reported.
+
+BENCHMARKS = {}  # Benchmark name -> function that takes a Random and returns one operation.
+
+
+def benchmark(name):
+    """Decorator that registers a benchmark setup function under `name`."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@contextlib.contextmanager
+def canned_input(module, responses):
+    """Makes input() in `module` return the strings from `responses` in
+    turn, and throws away anything printed while the block runs."""
+    responses = iter(responses)
+    module.input = lambda prompt="": next(responses)  # Shadows the built-in input().
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        del module.input
+
+
+def random_fourinarow_boards(rng, count, board_class=None):
+    """Returns `count` mid-game Four-in-a-Row boards from random games."""
+    boards = []
+    for i in range(count):
+        board = board_class() if board_class else fourinarow.TrackedBoard()
+        player_tile = fourinarow.PLAYER_X
+        for move in range(rng.randint(5, 30)):
+            columns = [column for column in range(fourinarow.BOARD_WIDTH)
+                       if fourinarow.get_landing_space(column, board) is not None]
+            board[fourinarow.get_landing_space(rng.choice(columns), board)] = player_tile
+            if fourinarow.is_winner(player_tile, board):
+                break
+            player_tile = fourinarow.PLAYER_O if player_tile == fourinarow.PLAYER_X else fourinarow.PLAYER_X
+        if board_class is None:
+            board = dict(board)  # A plain dictionary board, like get_new_board() makes.
+        boards.append(board)
+    return boards
+
+
+def cycle_over(items, function):
+    """Returns an operation that calls `function` on the next item each time."""
+    items = list(items)
+    index = [0]
+
+    def operation():
+        index[0] = (index[0] + 1) % len(items)
+        return function(items[index[0]])
+    return operation
+
+
+@benchmark('fourinarow.is_winner')
+def bench_fourinarow_is_winner(rng):
+    return cycle_over(random_fourinarow_boards(rng, 500),
+                      lambda board: fourinarow.is_winner(fourinarow.PLAYER_X, board))
+
+
+@benchmark('fourinarow.scan_is_winner')
+def bench_fourinarow_scan_is_winner(rng):
+    return cycle_over(random_fourinarow_boards(rng, 500),
+                      lambda board: fourinarow.scan_is_winner(fourinarow.PLAYER_X, board))
+
+
+@benchmark('fourinarow.is_winner BitBoard')
+def bench_fourinarow_is_winner_bitboard(rng):
+    return cycle_over(random_fourinarow_boards(rng, 500, fourinarow.BitBoard),
+                      lambda board: fourinarow.is_winner(fourinarow.PLAYER_X, board))
+
+
+@benchmark('fourinarow.is_full')
+def bench_fourinarow_is_full(rng):
+    return cycle_over(random_fourinarow_boards(rng, 500), fourinarow.is_full)
+
+
+@benchmark('fourinarow.get_player_move')
+def bench_fourinarow_get_player_move(rng):
+    boards = random_fourinarow_boards(rng, 500)
+    moves = []
+    for board in boards:
+        columns = [column for column in range(fourinarow.BOARD_WIDTH)
+                   if fourinarow.get_landing_space(column, board) is not None]
+        moves.append((board, fourinarow.COLUMN_LABELS[rng.choice(columns)]))
+
+    def operation():
+        board, response = moves[rng.randrange(len(moves))]
+        with canned_input(fourinarow, [response]):
+            return fourinarow.get_player_move(fourinarow.PLAYER_X, board)
+    return operation
+
+
+@benchmark('fourinarow.get_landing_space')
+def bench_fourinarow_get_landing_space(rng):
+    return cycle_over([(board, rng.randrange(fourinarow.BOARD_WIDTH)) for board in random_fourinarow_boards(rng, 500)],
+                      lambda item: fourinarow.get_landing_space(item[1], item[0]))
+
+
+def random_tictactoe_moves(rng, count):
+    """Returns `count` lists of (space, mark) moves from random games."""
+    games = []
+    for i in range(count):
+        spaces = list(tictactoe.ALL_SPACES)
+        rng.shuffle(spaces)
+        games.append([(space, tictactoe.X if index % 2 == 0 else tictactoe.O)
+                      for index, space in enumerate(spaces[:rng.randint(0, 9)])])
+    return games
+
+
+@benchmark('tictactoe.is_winner')
+def bench_tictactoe_is_winner(rng):
+    boards = []
+    for moves in random_tictactoe_moves(rng, 500):
+        board = tictactoe.get_blank_board()
+        for space, mark in moves:
+            tictactoe.update_board(board, space, mark)
+        boards.append(board)
+    return cycle_over(boards, lambda board: tictactoe.is_winner(board, tictactoe.X))
+
+
+def tictactoe_oop_boards(rng, board_class):
+    boards = []
+    for moves in random_tictactoe_moves(rng, 500):
+        board = board_class()
+        for space, mark in moves:
+            board.update_board(space, mark)
+        boards.append(board)
+    return boards
+
+
+@benchmark('TTTBoard.is_winner')
+def bench_tttboard_is_winner(rng):
+    return cycle_over(tictactoe_oop_boards(rng, tictactoe_oop.TTTBoard), lambda board: board.is_winner(tictactoe_oop.X))
+
+
+@benchmark('TTTBoard.get_board_str')
+def bench_tttboard_get_board_str(rng):
+    return cycle_over(tictactoe_oop_boards(rng, tictactoe_oop.TTTBoard), lambda board: board.get_board_str())
+
+
+@benchmark('HintBoard.get_board_str')
+def bench_hintboard_get_board_str(rng):
+    return cycle_over(tictactoe_oop_boards(rng, tictactoe_oop.HintBoard), lambda board: board.get_board_str())
+
+
+@benchmark('HybridBoard.get_board_str')
+def bench_hybridboard_get_board_str(rng):
+    return cycle_over(tictactoe_oop_boards(rng, tictactoe_oop.HybridBoard), lambda board: board.get_board_str())
+
+
+def hanoi_solution(disks, from_tower='A', to_tower='C', spare_tower='B'):
+    """Returns the optimal list of moves, such as 'AC', for `disks` disks."""
+    if disks == 0:
+        return []
+    return (hanoi_solution(disks - 1, from_tower, spare_tower, to_tower) + [from_tower + to_tower]
+            + hanoi_solution(disks - 1, spare_tower, to_tower, from_tower))
+
+
+@benchmark('towerofhanoi game loop')
+def bench_towerofhanoi_game_loop(rng):
+    solution = hanoi_solution(towerofhanoi.TOTAL_DISKS)
+
+    def operation():  # One operation is a whole solved game, display included.
+        with canned_input(towerofhanoi, solution):
+            try:
+                towerofhanoi.main()
+            except SystemExit:
+                pass  # main() exits once the puzzle is solved.
+    return operation
+
+
+def random_purses(rng, count):
+    return [(rng.randrange(100), rng.randrange(17), rng.randrange(29)) for i in range(count)]
+
+
+@benchmark('WizCoin()')
+def bench_wizcoin_construction(rng):
+    return cycle_over(random_purses(rng, 500), lambda coins: wizcoin.WizCoin(*coins))
+
+
+@benchmark('WizCoin < WizCoin')
+def bench_wizcoin_less_than(rng):
+    purses = [wizcoin.WizCoin(*coins) for coins in random_purses(rng, 501)]
+    return cycle_over(list(zip(purses, purses[1:])), lambda pair: pair[0] < pair[1])
+
+
+@benchmark('WizCoin == int')
+def bench_wizcoin_equals_int(rng):
+    return cycle_over([(wizcoin.WizCoin(*coins), rng.randrange(50000)) for coins in random_purses(rng, 500)],
+                      lambda pair: pair[0] == pair[1])
+
+
+@benchmark('WizCoin == tuple')
+def bench_wizcoin_equals_tuple(rng):
+    return cycle_over([(wizcoin.WizCoin(*coins), coins) for coins in random_purses(rng, 500)],
+                      lambda pair: pair[0] == pair[1])
+
+
+@benchmark('WizCoin.total')
+def bench_wizcoin_total(rng):
+    return cycle_over([wizcoin.WizCoin(*coins) for coins in random_purses(rng, 500)], lambda coin: coin.total)
+
+
+@benchmark('WizCoin + WizCoin')
+def bench_wizcoin_add(rng):
+    purses = [wizcoin.WizCoin(*coins) for coins in random_purses(rng, 501)]
+    return cycle_over(list(zip(purses, purses[1:])), lambda pair: pair[0] + pair[1])
+
+
+@benchmark('WizCoin in set')
+def bench_wizcoin_in_set(rng):
+    purses = {wizcoin.WizCoin(*coins) for coins in random_purses(rng, 500)}
+    return cycle_over([wizcoin.WizCoin(*coins) for coins in random_purses(rng, 500)], lambda coin: coin in purses)
+
+
+@benchmark('WizCoin.from_knuts lightest')
+def bench_wizcoin_from_knuts(rng):
+    return cycle_over([rng.randrange(50000) for i in range(500)],
+                      lambda amount: wizcoin.WizCoin.from_knuts(amount, wizcoin.LIGHTEST))
+
+
+@benchmark('WizCoinArray.total x1000')
+def bench_wizcoin_array_total(rng):
+    purses = wizcoin_array.WizCoinArray(*zip(*random_purses(rng, 1000)))
+    return lambda: purses.total
+
+
+@benchmark('WizCoinArray < WizCoin x1000')
+def bench_wizcoin_array_less_than(rng):
+    purses = wizcoin_array.WizCoinArray(*zip(*random_purses(rng, 1000)))
+    threshold = wizcoin.WizCoin(50, 0, 0)
+    return lambda: purses < threshold
+
+
+@benchmark('WizCoinArray.from_knuts x1000')
+def bench_wizcoin_array_from_knuts(rng):
+    amounts = [rng.randrange(50000) for i in range(1000)]
+    return lambda: wizcoin_array.WizCoinArray.from_knuts(amounts, wizcoin.LIGHTEST)
+
+
+def run_benchmark(name, min_time=MIN_TIME, repeats=REPEATS, seed=SEED):
+    """Runs one benchmark and returns a dictionary of its results."""
+    operation = BENCHMARKS[name](random.Random(seed))
+    # Time bigger and bigger batches, then size the batch to take min_time:
+    batch_size = 1
+    while True:
+        start_time = time.perf_counter()
+        for i in range(batch_size):
+            operation()
+        seconds = time.perf_counter() - start_time
+        if seconds >= min_time / 10:
+            break
+        batch_size *= 2
+    batch_size = max(1, int(batch_size * min_time / seconds))
+    best_seconds = float('inf')
+    for repeat in range(repeats):
+        gc.collect()
+        start_time = time.perf_counter()
+        for i in range(batch_size):
+            operation()
+        best_seconds = min(best_seconds, time.perf_counter() - start_time)
+    # Measure memory separately, since tracing slows everything down:
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    for i in range(batch_size):
+        operation()
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    return {
+        'name': name,
+        'operations': batch_size,
+        'ops_per_sec': batch_size / best_seconds,
+        'peak_bytes': memory_peak - memory_before,
+        'retained_bytes': memory_after - memory_before,
+        'retained_blocks': sys.getallocatedblocks() - blocks_before,
+    }
+
+
+def run_all(pattern='', min_time=MIN_TIME, seed=SEED):
+    """Runs every benchmark whose name contains `pattern` and returns the
+    results as a JSON-friendly dictionary."""
+    results = []
+    for name in BENCHMARKS:
+        if pattern.lower() in name.lower():
+            results.append(run_benchmark(name, min_time, seed=seed))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'benchmarks': results,
+    }
+
+
+def print_results(report, baseline=None):
+    """Prints a table of results, with speedups if there is a baseline."""
+    old_rates = {}
+    if baseline:
+        old_rates = {result['name']: result['ops_per_sec'] for result in baseline['benchmarks']}
+    print(f"{'benchmark':32} {'ops/sec':>12} {'peak KiB':>9} {'kept blocks':>11}" + ('  speedup' if baseline else ''))
+    for result in report['benchmarks']:
+        line = (f"{result['name']:32} {result['ops_per_sec']:12,.0f} {result['peak_bytes'] / 1024:9.1f} "
+                f"{result['retained_blocks']:11}")
+        if result['name'] in old_rates:
+            line += f"  {result['ops_per_sec'] / old_rates[result['name']]:6.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the game modules.')
+    parser.add_argument('pattern', nargs='?', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--json', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='a JSON file from an earlier run to compare against')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help='seconds per timed batch')
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+    report = run_all(args.pattern, args.min_time, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_results(report, baseline)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
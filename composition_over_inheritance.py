@@ -14,9 +14,10 @@ class WizardCustomer(wizcoin.WizCoin):
         super().__init__(0, 0, 0)
 
 
-wizard = WizardCustomer('Alice')
-print(f'{wizard.name} has {wizard.value()} knuts worth of money.')
-print(f'{wizard.name}\'s coins weigh {wizard.weight_in_grams()} grams.')
+if __name__ == '__main__':  # Only show the examples when run, not when imported.
+    wizard = WizardCustomer('Alice')
+    print(f'{wizard.name} has {wizard.value()} knuts worth of money.')
+    print(f'{wizard.name}\'s coins weigh {wizard.weight_in_grams()} grams.')
 
 
 class WizardCustomer:
@@ -29,6 +30,7 @@ class WizardCustomer:
         self.purse = wizcoin.WizCoin(0, 0, 0)
 
 
-wizard = WizardCustomer('Alice')
-print(f'{wizard.name} has {wizard.purse.value()} knuts worth of money.')
-print(f'{wizard.name}\'s coins weigh {wizard.purse.weight_in_grams()} grams.')
+if __name__ == '__main__':
+    wizard = WizardCustomer('Alice')
+    print(f'{wizard.name} has {wizard.purse.value()} knuts worth of money.')
+    print(f'{wizard.name}\'s coins weigh {wizard.purse.weight_in_grams()} grams.')
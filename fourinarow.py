@@ -2,36 +2,43 @@
 A tile-dropping game to get four-in-a-row, similar to Connect Four."""
 import sys
 
+import mnk_board
+
 # Constants used for displaying the board:
 EMPTY_SPACE = "."  # A period is easier to count than a space.
 PLAYER_X = "X"
 PLAYER_O = "O"
-# Note: Update BOARD_TEMPLATE & COLUMN_LABELS if BOARD_WIDTH is changed.
-BOARD_WIDTH = 7
+BOARD_WIDTH = 7  # Columns are labeled with one digit, so at most 9.
 BOARD_HEIGHT = 6
-COLUMN_LABELS = ("1", "2", "3", "4", "5", "6", "7")
+assert 4 <= BOARD_WIDTH <= 9 and BOARD_HEIGHT >= 4
+COLUMN_LABELS = tuple(str(column_number) for column_number in range(1, BOARD_WIDTH + 1))
 assert len(COLUMN_LABELS) == BOARD_WIDTH
-# The template string for displaying the board:
-BOARD_TEMPLATE = """
-1234567
-+-------+
-|{}{}{}{}{}{}{}|
-|{}{}{}{}{}{}{}|
-|{}{}{}{}{}{}{}|
-|{}{}{}{}{}{}{}|
-|{}{}{}{}{}{}{}|
-|{}{}{}{}{}{}{}|
-+-------+"""
+# The template string for displaying the board. It is built from
+# BOARD_WIDTH and BOARD_HEIGHT, and for a 7 x 6 board looks like this:
+# 1234567
+# +-------+
+# |{}{}{}{}{}{}{}|  <- One line like this for each of the six rows.
+# +-------+
+BOARD_EDGE = "+" + "-" * BOARD_WIDTH + "+"
+BOARD_TEMPLATE = "\n".join(["", "".join(COLUMN_LABELS), BOARD_EDGE]
+                           + ["|" + "{}" * BOARD_WIDTH + "|"] * BOARD_HEIGHT
+                           + [BOARD_EDGE])
+# Four-in-a-Row is 4 in a row on a BOARD_WIDTH x BOARD_HEIGHT board with
+# gravity. The engine in mnk_board works out the winning lines:
+GEOMETRY = mnk_board.get_geometry(BOARD_WIDTH, BOARD_HEIGHT, 4)
+# The winning lines for dictionary boards, grouped by the space each starts on:
+LINES_BY_START = mnk_board.lines_by_start(GEOMETRY)
 
 
 def main():
     """Runs a single game of Four-in-a-Row."""
     print(
-        """Four-in-a-Row, by Al Sweigart al@inventwithpython.com
-        Two players take turns dropping tiles into one of seven columns, trying
-        to make Four-in-a-Row horizontally, vertically, or diagonally.""")
+        f"""Four-in-a-Row, by Al Sweigart al@inventwithpython.com
+        Two players take turns dropping tiles into one of {BOARD_WIDTH} columns (each
+        {BOARD_HEIGHT} tiles tall), trying to make Four-in-a-Row horizontally,
+        vertically, or diagonally.""")
     # Set up a new game:
-    game_board = get_new_board()
+    game_board = TrackedBoard()
     player_turn = PLAYER_X
     while True:  # Run a player's turn.
         # Display the board and get player's move:
@@ -66,8 +73,232 @@ def get_new_board():
     return board
 
 
+def get_new_bitboard():
+    """Returns an empty BitBoard, a faster drop-in for get_new_board()."""
+    return BitBoard()
+
+
+class BitBoard:
+    """A Four-in-a-Row board that packs each player's tiles into an integer.
+    Bit number `column_index * (BOARD_HEIGHT + 1) + level` is set when a tile
+    sits `level` spaces above the bottom of that column. The extra bit on top
+    of each column always stays empty, so a line shifted out of one column
+    can never wrap around into the next one.
+
+    The board can also be indexed with (column_index, row_index) keys just
+    like the dictionary from get_new_board(), so main(), display_board() and
+    the other functions in this module work with either kind of board."""
+
+    def __init__(self):
+        self.bits = {PLAYER_X: 0, PLAYER_O: 0}  # One bitboard per player.
+        self.heights = [0] * BOARD_WIDTH  # How many tiles are in each column.
+        self.move_count = 0
+
+    @classmethod
+    def from_board(cls, board):
+        """Returns a BitBoard holding the same tiles as the dictionary
+        `board`. The tiles must be resting on the bottom or on other tiles."""
+        bit_board = cls()
+        for row_index in range(BOARD_HEIGHT - 1, -1, -1):  # Bottom row first.
+            for column_index in range(BOARD_WIDTH):
+                tile = board[(column_index, row_index)]
+                if tile != EMPTY_SPACE:
+                    bit_board[(column_index, row_index)] = tile
+        return bit_board
+
+    def copy(self):
+        """Returns a new BitBoard with the same tiles as this one."""
+        new_board = self.__class__.__new__(self.__class__)
+        new_board.bits = dict(self.bits)
+        new_board.heights = list(self.heights)
+        new_board.move_count = self.move_count
+        return new_board
+
+    def __getitem__(self, key):
+        mask = _cell_mask(key)
+        for player_tile, bits in self.bits.items():
+            if bits & mask:
+                return player_tile
+        return EMPTY_SPACE
+
+    def __setitem__(self, key, player_tile):
+        column_index, row_index = key
+        if (column_index, row_index) != self.landing_space(column_index):
+            raise ValueError(f"{key} is not where a tile dropped in column {column_index + 1} would land.")
+        self.drop(column_index, player_tile)
+
+    def landing_space(self, column_index):
+        """Returns the (column, row) a tile dropped into `column_index` would
+        fall into, or None if the column is full."""
+        height = self.heights[column_index]
+        if height == BOARD_HEIGHT:
+            return None
+        return (column_index, BOARD_HEIGHT - 1 - height)
+
+    def drop(self, column_index, player_tile):
+        """Drops `player_tile` into `column_index` and returns the
+        (column, row) it landed on."""
+        space = self.landing_space(column_index)
+        if space is None:
+            raise ValueError(f"Column {column_index + 1} is full.")
+        if player_tile not in self.bits:
+            raise ValueError(f"{player_tile!r} is not {PLAYER_X} or {PLAYER_O}.")
+        self.bits[player_tile] |= 1 << (column_index * (BOARD_HEIGHT + 1) + self.heights[column_index])
+        self.heights[column_index] += 1
+        self.move_count += 1
+        return space
+
+    def is_full(self):
+        """Returns True if there are no empty spaces left on the board."""
+        return self.move_count == BOARD_WIDTH * BOARD_HEIGHT
+
+    def is_winner(self, player_tile):
+        """Returns True if `player_tile` has four tiles in a row."""
+        return _has_four_in_a_row(self.bits[player_tile])
+
+
+def position_key(x_bits, o_bits):
+    """Returns a key for the position with these X and O BitBoard bits: X's
+    bits plus the mask of all tiles. Within a column the sum can't carry
+    into the next column, so every arrangement of tiles gets its own key."""
+    return x_bits + (x_bits | o_bits)
+
+
+class TrackedBoard(dict):
+    """A dictionary board, like the one get_new_board() returns, that plays
+    its moves on an mnk_board.MNKBoard. The engine keeps the column heights,
+    the number of moves made, the last tile dropped and a bit mask of each
+    player's tiles, so is_winner() is a few shifts of one mask instead of a
+    scan of every line.
+
+    Tiles can only be placed where they would land after being dropped, and
+    can't be taken off again: the dictionary methods that would change the
+    tiles without going through drop() raise TypeError."""
+
+    def __init__(self):
+        super().__init__(get_new_board())
+        self.engine = mnk_board.MNKBoard(BOARD_WIDTH, BOARD_HEIGHT, 4, gravity=True, empty=EMPTY_SPACE)
+
+    @property
+    def heights(self):
+        """How many tiles are in each column."""
+        return self.engine.heights
+
+    @property
+    def move_count(self):
+        return self.engine.move_count
+
+    @property
+    def last_move(self):
+        """The (column, row) of the last tile dropped, or None."""
+        return self.engine.last_move
+
+    def copy(self):
+        """Returns a new TrackedBoard with the same tiles as this one."""
+        new_board = self.__class__.__new__(self.__class__)
+        dict.update(new_board, self)
+        new_board.engine = self.engine.copy()
+        return new_board
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()  # The tiles are strings, so there's nothing deeper to copy.
+
+    def __reduce__(self):
+        """Pickles the board as its drops, bottom row first with the last
+        move at the end, so unpickling replays them through drop() and
+        rebuilds the engine. Plain dict pickling would set every space
+        through __setitem__, which only accepts drops."""
+        drops = [(column_index, self[(column_index, row_index)])
+                 for row_index in range(BOARD_HEIGHT - 1, -1, -1) for column_index in range(BOARD_WIDTH)
+                 if self[(column_index, row_index)] != EMPTY_SPACE and (column_index, row_index) != self.last_move]
+        if self.last_move is not None:
+            drops.append((self.last_move[0], self[self.last_move]))
+        return (self.__class__.from_drops, (drops,))
+
+    @classmethod
+    def from_drops(cls, drops):
+        """Returns a board with the tiles of a list of (column_index, tile)
+        drops dropped in, in order."""
+        board = cls()
+        for column_index, player_tile in drops:
+            board.drop(column_index, player_tile)
+        return board
+
+    def __setitem__(self, key, player_tile):
+        column_index, row_index = key
+        if (column_index, row_index) != self.landing_space(column_index):
+            raise ValueError(f"{key} is not where a tile dropped in column {column_index + 1} would land.")
+        self.drop(column_index, player_tile)
+
+    def setdefault(self, key, player_tile=None):
+        return self[key]  # Every space is already on the board, so nothing is ever added.
+
+    def _untracked_change(self, *args, **kwargs):
+        """Stands in for the dict methods that would change tiles without
+        going through the engine."""
+        raise TypeError("A TrackedBoard's tiles can only be changed by dropping them in.")
+
+    update = pop = popitem = clear = __delitem__ = __ior__ = _untracked_change
+
+    def landing_space(self, column_index):
+        """Returns the (column, row) a tile dropped into `column_index` would
+        fall into, or None if the column is full."""
+        row_index = self.engine.landing_row(column_index)
+        if row_index is None:
+            return None
+        return (column_index, row_index)
+
+    def drop(self, column_index, player_tile):
+        """Drops `player_tile` into `column_index` and returns the
+        (column, row) it landed on."""
+        space = self.landing_space(column_index)
+        if space is None:
+            raise ValueError(f"Column {column_index + 1} is full.")
+        if player_tile not in (PLAYER_X, PLAYER_O):  # Checked before anything changes.
+            raise ValueError(f"{player_tile!r} is not {PLAYER_X} or {PLAYER_O}.")
+        self.engine.place(*space, player_tile)
+        dict.__setitem__(self, space, player_tile)
+        return space
+
+    def is_full(self):
+        """Returns True if there are no empty spaces left on the board."""
+        return self.engine.is_full()
+
+    def is_winner(self, player_tile):
+        """Returns True if `player_tile` has four tiles in a row."""
+        return self.engine.is_winner(player_tile)
+
+
+def _cell_mask(key):
+    """Returns the BitBoard bit for a (column_index, row_index) key."""
+    column_index, row_index = key
+    if not (0 <= column_index < BOARD_WIDTH and 0 <= row_index < BOARD_HEIGHT):
+        raise KeyError(key)
+    return 1 << (column_index * (BOARD_HEIGHT + 1) + BOARD_HEIGHT - 1 - row_index)
+
+
+def _has_four_in_a_row(bits):
+    """Returns True if the bitboard `bits` contains four set bits in a row."""
+    # Shifting by 1 moves a tile up, by BOARD_HEIGHT + 1 moves it across, and
+    # by BOARD_HEIGHT and BOARD_HEIGHT + 2 moves it along the two diagonals.
+    for shift in (1, BOARD_HEIGHT + 1, BOARD_HEIGHT, BOARD_HEIGHT + 2):
+        pairs = bits & (bits >> shift)  # Tiles with a neighbor in this direction.
+        if pairs & (pairs >> (2 * shift)):  # Two pairs next to each other.
+            return True
+    return False
+
+
 def display_board(board):
     """Display the board and its tiles on the screen."""
+    print(get_board_str(board))
+
+
+def get_board_str(board):
+    """Returns the text of the board and its tiles, as display_board()
+    shows it."""
 
     # Prepare a list to pass to the format() string method for the board
     # template. The list holds all of the board's tiles (and empty
@@ -76,8 +307,7 @@ def display_board(board):
     for row_index in range(BOARD_HEIGHT):
         for column_index in range(BOARD_WIDTH):
             tile_chars.append(board[(column_index, row_index)])
-    # Display the board:
-    print(BOARD_TEMPLATE.format(*tile_chars))
+    return BOARD_TEMPLATE.format(*tile_chars)
 
 
 def get_player_move(player_tile, board):
@@ -90,25 +320,64 @@ def get_player_move(player_tile, board):
         if response == "QUIT":
             print("Thanks for playing!")
             sys.exit()
-        if response not in COLUMN_LABELS:
-            print(f"Enter a number from 1 to {BOARD_WIDTH}.")
-            continue  # Ask player again for their move.
-        column_index = int(response) - 1
-        # -1 for 0-based column indexes.
-        # If the column is full, ask for a move again:
-        if board[(column_index, 0)] != EMPTY_SPACE:
-            print("That column is full, select another one.")
+        try:
+            return parse_move(response, board)
+        except ValueError as error:
+            print(error)
             continue  # Ask player again for their move.
-        # Starting from the bottom, find the first empty space.
-        for row_index in range(BOARD_HEIGHT - 1, -1, -1):
-            if board[(column_index, row_index)] == EMPTY_SPACE:
-                return (column_index, row_index)
+
+
+def parse_move(response, board):
+    """Returns the (column, row) that a tile falls into when a player
+    responds with a column label. Raises ValueError with a message for the
+    player if that isn't a legal move. This doesn't do any input or output,
+    so it can be used by anything that gets moves from players."""
+
+    if response not in COLUMN_LABELS:
+        raise ValueError(f"Enter a number from 1 to {BOARD_WIDTH}.")
+    column_index = int(response) - 1
+    # -1 for 0-based column indexes.
+    landing_space = get_landing_space(column_index, board)
+    # If the column is full, the player must select another one:
+    if landing_space is None:
+        raise ValueError("That column is full, select another one.")
+    return landing_space
+
+
+def get_landing_space(column_index, board):
+    """Returns the (column, row) a tile dropped into `column_index` falls
+    into, or None if that column is full."""
+
+    if isinstance(board, (BitBoard, TrackedBoard)):
+        return board.landing_space(column_index)  # Read the column height.
+    return scan_landing_space(column_index, board)
+
+
+def scan_landing_space(column_index, board):
+    """Finds the landing space by walking up the column. This works on any
+    board and is kept as a reference for cross-checking faster boards."""
+
+    if board[(column_index, 0)] != EMPTY_SPACE:
+        return None
+    # Starting from the bottom, find the first empty space.
+    for row_index in range(BOARD_HEIGHT - 1, -1, -1):
+        if board[(column_index, row_index)] == EMPTY_SPACE:
+            return (column_index, row_index)
 
 
 def is_full(board):
     """Returns True if the `board` has no empty spaces, otherwise
     returns False."""
 
+    if isinstance(board, (BitBoard, TrackedBoard)):
+        return board.is_full()  # Compare the move counter.
+    return scan_is_full(board)
+
+
+def scan_is_full(board):
+    """Checks every space for `is_full()`. This works on any board and is
+    kept as a reference for cross-checking faster boards."""
+
     for row_index in range(BOARD_HEIGHT):
         for column_index in range(BOARD_WIDTH):
             if board[(column_index, row_index)] == EMPTY_SPACE:
@@ -120,6 +389,20 @@ def is_winner(player_tile, board):
     """Returns True if `playerTile` has four tiles in a row on `board`,
     otherwise returns False."""
 
+    if isinstance(board, (BitBoard, TrackedBoard)):
+        return board.is_winner(player_tile)  # No need to scan every line.
+    for start, other_spaces in LINES_BY_START:
+        if board[start] == player_tile:
+            for space2, space3, space4 in other_spaces:
+                if board[space2] == board[space3] == board[space4] == player_tile:
+                    return True
+    return False
+
+
+def scan_is_winner(player_tile, board):
+    """Checks all 69 lines for `is_winner()`. This works on any board and is
+    kept as a reference for cross-checking faster boards."""
+
     # Go through the entire board, checking for four-in-a-row:
     for column_index in range(BOARD_WIDTH - 3):
         for row_index in range(BOARD_HEIGHT):
@@ -0,0 +1,297 @@
+"""A computer opponent for Four-in-a-Row.
+The search is a negamax alpha-beta search over two BitBoard integers, with
+center-first move ordering, a Zobrist-hashed transposition table and
+iterative deepening that stops when the per-move time budget runs out."""
+import collections
+import random
+import sys
+import time
+
+import fourinarow
+from fourinarow import BOARD_HEIGHT, BOARD_WIDTH, PLAYER_O, PLAYER_X
+
+TIME_LIMIT = 0.05  # Seconds the computer may think about each move.
+TABLE_SIZE = 1 << 16  # Number of transposition table slots.
+CELL_COUNT = BOARD_WIDTH * BOARD_HEIGHT
+WIN_SCORE = 1_000_000  # Wins score WIN_SCORE minus the number of moves made.
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2  # Kinds of transposition table score.
+
+# The bit layout matches fourinarow.BitBoard: BOARD_HEIGHT + 1 bits per
+# column, starting at the bottom, with an always-empty bit on top.
+COLUMN_BITS = BOARD_HEIGHT + 1
+BOTTOM_MASKS = [1 << (column_index * COLUMN_BITS) for column_index in range(BOARD_WIDTH)]
+COLUMN_MASKS = [((1 << BOARD_HEIGHT) - 1) << (column_index * COLUMN_BITS) for column_index in range(BOARD_WIDTH)]
+BOTTOM_MASK = sum(BOTTOM_MASKS)
+BOARD_MASK = sum(COLUMN_MASKS)
+CENTER_MASK = COLUMN_MASKS[BOARD_WIDTH // 2]
+# Try the center columns first, since they take part in the most lines:
+MOVE_ORDER = sorted(range(BOARD_WIDTH), key=lambda column_index: abs(2 * column_index - (BOARD_WIDTH - 1)))
+
+# One random 64-bit number per (player, bit) for Zobrist hashing. Player 0
+# is whoever moved first, so a hash only depends on where the tiles are:
+_zobrist_random = random.Random(0)
+ZOBRIST_KEYS = [[_zobrist_random.getrandbits(64) for bit_index in range(BOARD_WIDTH * COLUMN_BITS)]
+                for player in range(2)]
+
+SearchResult = collections.namedtuple("SearchResult", "column score depth nodes seconds nodes_per_second")
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget has run out."""
+    pass
+
+
+class TranspositionTable:
+    """A fixed-size table of search results indexed by Zobrist hash.
+    Each slot holds one entry. A new entry replaces the old one if the slot
+    is empty, holds the same position, was filled during an older search, or
+    was searched to the same depth or less (deeper results are worth more)."""
+
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0  # Bumped by new_search() to age old entries.
+
+    def new_search(self):
+        """Marks every entry stored so far as belonging to an older search."""
+        self.generation += 1
+
+    def lookup(self, key):
+        """Returns the (key, depth, kind, score, column, generation) entry
+        for `key`, or None if it isn't in the table."""
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, kind, score, column):
+        """Stores a search result, unless the replacement policy keeps the
+        entry already in the slot."""
+        index = key % self.size
+        old_entry = self.slots[index]
+        if (old_entry is None or old_entry[0] == key or old_entry[5] != self.generation
+                or depth >= old_entry[1]):
+            self.slots[index] = (key, depth, kind, score, column, self.generation)
+
+
+def winning_spaces(tiles, mask):
+    """Returns a bitboard of the empty spaces that would give `tiles` four in
+    a row. `mask` holds every tile on the board."""
+    # Vertical lines can only be completed on top:
+    spaces = (tiles << 1) & (tiles << 2) & (tiles << 3)
+    # Across, then the two diagonals:
+    for shift in (COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1):
+        pairs = (tiles << shift) & (tiles << (2 * shift))
+        spaces |= pairs & (tiles << (3 * shift))
+        spaces |= pairs & (tiles >> shift)
+        pairs = (tiles >> shift) & (tiles >> (2 * shift))
+        spaces |= pairs & (tiles << shift)
+        spaces |= pairs & (tiles >> (3 * shift))
+    return spaces & (BOARD_MASK ^ mask)
+
+
+def evaluate(tiles, mask):
+    """Scores a position that wasn't searched to the end, from the point of
+    view of the player who owns `tiles` and is about to move."""
+    opponent_tiles = tiles ^ mask
+    score = 4 * (bin(winning_spaces(tiles, mask)).count("1")
+                 - bin(winning_spaces(opponent_tiles, mask)).count("1"))
+    score += bin(tiles & CENTER_MASK).count("1") - bin(opponent_tiles & CENTER_MASK).count("1")
+    return score
+
+
+class Searcher:
+    """Runs one move's worth of iterative deepening search."""
+
+    def __init__(self, table, deadline):
+        self.table = table
+        self.deadline = deadline
+        self.nodes = 0
+
+    def negamax(self, tiles, mask, move_count, key, depth, alpha, beta):
+        """Returns the score of the position for the player who owns `tiles`
+        and is about to move, searching `depth` more moves ahead."""
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        possible = (mask + BOTTOM_MASK) & BOARD_MASK
+        if winning_spaces(tiles, mask) & possible:
+            return WIN_SCORE - move_count - 1  # We win with the next move.
+        if move_count + 1 >= CELL_COUNT:
+            return 0  # The last space gets filled without a win: a tie.
+        if depth == 0:
+            return evaluate(tiles, mask)
+
+        original_alpha = alpha
+        best_column = None
+        entry = self.table.lookup(key)
+        if entry is not None:
+            best_column = entry[4]  # Search the remembered best move first.
+            if entry[1] >= depth:
+                kind, score = entry[2], entry[3]
+                if kind == EXACT:
+                    return score
+                elif kind == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                elif kind == UPPER_BOUND:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        # The opponent must block any space where they could win next turn:
+        forced = winning_spaces(tiles ^ mask, mask) & possible
+        if forced:
+            possible = forced
+        columns = MOVE_ORDER
+        if best_column is not None:
+            columns = [best_column] + [column for column in MOVE_ORDER if column != best_column]
+        player = move_count & 1
+        best_score = -WIN_SCORE - 1
+        for column_index in columns:
+            move = possible & COLUMN_MASKS[column_index]
+            if not move:
+                continue
+            score = -self.negamax(tiles ^ mask, mask | move, move_count + 1,
+                                  key ^ ZOBRIST_KEYS[player][move.bit_length() - 1],
+                                  depth - 1, -beta, -alpha)
+            if score > best_score:
+                best_score, best_column = score, column_index
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break  # The opponent won't allow this position.
+
+        if best_score <= original_alpha:
+            kind = UPPER_BOUND
+        elif best_score >= beta:
+            kind = LOWER_BOUND
+        else:
+            kind = EXACT
+        self.table.store(key, depth, kind, best_score, best_column)
+        return best_score
+
+
+def position_from_board(board, player_tile):
+    """Returns (tiles, mask, move_count, key) for `player_tile` to move on
+    `board`, which can be a dictionary board, TrackedBoard or BitBoard."""
+    if not isinstance(board, fourinarow.BitBoard):
+        board = fourinarow.BitBoard.from_board(board)
+    other_tile = PLAYER_O if player_tile == PLAYER_X else PLAYER_X
+    tiles = board.bits[player_tile]
+    mask = tiles | board.bits[other_tile]
+    move_count = bin(mask).count("1")
+    # Whoever moved first is Zobrist player 0:
+    first_bits = tiles if move_count % 2 == 0 else board.bits[other_tile]
+    key = 0
+    for bit_index in range(BOARD_WIDTH * COLUMN_BITS):
+        if mask >> bit_index & 1:
+            key ^= ZOBRIST_KEYS[0 if first_bits >> bit_index & 1 else 1][bit_index]
+    return tiles, mask, move_count, key
+
+
+def choose_move(board, player_tile, time_limit=TIME_LIMIT, max_depth=CELL_COUNT, table=None, book=None):
+    """Searches for the best column for `player_tile` to drop a tile into,
+    going one move deeper at a time until `time_limit` seconds have passed.
+    Returns a SearchResult for the deepest search that finished. If `book`
+    is a fourinarow_book.OpeningBook that knows this position, its move is
+    returned without searching and the result has a depth of 0."""
+    start_time = time.perf_counter()
+    if book is not None:
+        book_move = book.lookup(board, player_tile)
+        if book_move is not None:
+            return SearchResult(book_move[0], book_move[1], 0, 0, time.perf_counter() - start_time, 0.0)
+    if table is None:
+        table = TranspositionTable()
+    table.new_search()
+    tiles, mask, move_count, key = position_from_board(board, player_tile)
+    searcher = Searcher(table, start_time + time_limit)
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    legal_columns = [column for column in MOVE_ORDER if possible & COLUMN_MASKS[column]]
+    if not legal_columns:
+        raise ValueError("The board is full.")
+    # Until a search finishes, fall back on the most central legal column:
+    best_column, best_score, best_depth = legal_columns[0], 0, 0
+    for depth in range(1, min(max_depth, CELL_COUNT - move_count) + 1):
+        try:
+            column, score = search_root(searcher, tiles, mask, move_count, key, depth,
+                                        [best_column] + [c for c in legal_columns if c != best_column])
+        except SearchTimeout:
+            break  # Use the result from the last depth that finished.
+        best_column, best_score, best_depth = column, score, depth
+        if abs(score) >= WIN_SCORE - CELL_COUNT:
+            break  # A forced win or loss has been found; looking deeper won't change it.
+        if time.perf_counter() > searcher.deadline:
+            break
+    seconds = time.perf_counter() - start_time
+    return SearchResult(best_column, best_score, best_depth, searcher.nodes, seconds,
+                        searcher.nodes / seconds if seconds else 0.0)
+
+
+def search_root(searcher, tiles, mask, move_count, key, depth, columns):
+    """Searches each of `columns` to `depth` and returns (column, score)."""
+    possible = (mask + BOTTOM_MASK) & BOARD_MASK
+    wins = winning_spaces(tiles, mask) & possible
+    player = move_count & 1
+    alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+    best_column = columns[0]
+    for column_index in columns:
+        move = possible & COLUMN_MASKS[column_index]
+        if wins & move:
+            return column_index, WIN_SCORE - move_count - 1  # Win right away, scored as negamax() does.
+        if move_count + 1 == CELL_COUNT:
+            return column_index, 0  # The last space on the board.
+        score = -searcher.negamax(tiles ^ mask, mask | move, move_count + 1,
+                                  key ^ ZOBRIST_KEYS[player][move.bit_length() - 1],
+                                  depth - 1, -beta, -alpha)
+        if score > alpha:
+            alpha, best_column = score, column_index
+    return best_column, alpha
+
+
+def get_computer_move(player_tile, board, time_limit=TIME_LIMIT, table=None, book=None):
+    """Picks a column for the computer and returns the (column, row) that the
+    tile falls into, like fourinarow.get_player_move() does."""
+    result = choose_move(board, player_tile, time_limit, table=table, book=book)
+    if result.depth == 0:
+        print(f"Player {player_tile} drops into column {result.column + 1} (from the opening book).")
+        return fourinarow.get_landing_space(result.column, board)
+    print(f"Player {player_tile} drops into column {result.column + 1} "
+          f"(depth {result.depth}, {result.nodes} nodes, {result.nodes_per_second:,.0f} nodes/sec).")
+    return fourinarow.get_landing_space(result.column, board)
+
+
+def main():
+    """Runs a game of Four-in-a-Row against the computer."""
+    print(f"""Four-in-a-Row against the computer.
+        Drop tiles into one of {BOARD_WIDTH} columns (each {BOARD_HEIGHT} tiles tall), trying
+        to make Four-in-a-Row horizontally, vertically, or diagonally before
+        the computer does.""")
+    print("Do you want to be X (goes first) or O?")
+    human_tile = PLAYER_O if input("> ").upper().strip() == PLAYER_O else PLAYER_X
+    table = TranspositionTable()  # Keep what was learned between moves.
+    import fourinarow_book  # Imported here since fourinarow_book imports this module.
+    book = fourinarow_book.load_book()  # None if the book hasn't been built.
+    game_board = fourinarow.TrackedBoard()
+    player_turn = PLAYER_X
+    while True:  # Run a player's turn.
+        fourinarow.display_board(game_board)
+        if player_turn == human_tile:
+            player_move = fourinarow.get_player_move(player_turn, game_board)
+        else:
+            player_move = get_computer_move(player_turn, game_board, table=table, book=book)
+        game_board[player_move] = player_turn
+        # Check for a win or tie:
+        if fourinarow.is_winner(player_turn, game_board):
+            fourinarow.display_board(game_board)  # Display the board one last time.
+            print(f"Player {player_turn} has won!")
+            sys.exit()
+        elif fourinarow.is_full(game_board):
+            fourinarow.display_board(game_board)  # Display the board one last time.
+            print("There is a tie!")
+            sys.exit()
+        # Switch turns to other player:
+        player_turn = PLAYER_O if player_turn == PLAYER_X else PLAYER_X
+
+
+# If this program was run (instead of imported), run the game:
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Vectorized Four-in-a-Row checks over many boards at once with NumPy.
+A batch of boards is an array of shape (N, BOARD_HEIGHT, BOARD_WIDTH)
+indexed as [board, row_index, column_index], with row 0 at the top just
+like the dictionary boards. The cells hold either the tile strings "X",
+"O" and "." or the small integer codes in TILE_CODES. The board size is
+taken from the array's shape, so any width and height works."""
+import numpy as np
+
+import fourinarow
+from fourinarow import EMPTY_SPACE, PLAYER_O, PLAYER_X
+
+TILE_CODES = {EMPTY_SPACE: 0, PLAYER_X: 1, PLAYER_O: 2}
+LINE_LENGTH = 4
+
+
+def boards_to_array(boards, height=fourinarow.BOARD_HEIGHT, width=fourinarow.BOARD_WIDTH):
+    """Returns a uint8 array of TILE_CODES for a list of dictionary boards
+    (or BitBoards, or anything else indexed by (column, row) keys)."""
+    array = np.empty((len(boards), height, width), dtype=np.uint8)
+    for board_index, board in enumerate(boards):
+        array[board_index] = [[TILE_CODES[board[(column_index, row_index)]] for column_index in range(width)]
+                              for row_index in range(height)]
+    return array
+
+
+def _tile_value(player_tile, boards):
+    """Returns what `player_tile` looks like in the `boards` array."""
+    if boards.dtype.kind == "U":
+        return player_tile  # The array holds tile strings.
+    return TILE_CODES[player_tile]
+
+
+def _any_line(tiles, row_step, column_step, length):
+    """For a boolean (N, height, width) array, returns a boolean array of
+    length N that is True where `length` True cells line up in the
+    (row_step, column_step) direction."""
+    board_count, height, width = tiles.shape
+    rows = height - row_step * (length - 1)  # Rows a line can start on.
+    columns = width - column_step * (length - 1)  # Columns a line can start on.
+    if rows <= 0 or columns <= 0:
+        return np.zeros(board_count, dtype=bool)
+    # AND together the board shifted by 0, 1, 2 and 3 steps:
+    lines = tiles[:, :rows, :columns].copy()
+    for step in range(1, length):
+        row_start, column_start = step * row_step, step * column_step
+        lines &= tiles[:, row_start:row_start + rows, column_start:column_start + columns]
+    return lines.reshape(board_count, rows * columns).any(axis=1)  # -1 can't be worked out when N is 0.
+
+
+def is_winner_batch(player_tile, boards, length=LINE_LENGTH):
+    """Returns a boolean array that is True for each board in `boards` where
+    `player_tile` has `length` tiles in a row."""
+    boards = np.asarray(boards)
+    tiles = boards == _tile_value(player_tile, boards)
+    flipped = tiles[:, :, ::-1]  # Turns left-down diagonals into right-down ones.
+    return (_any_line(tiles, 0, 1, length)  # Across.
+            | _any_line(tiles, 1, 0, length)  # Down.
+            | _any_line(tiles, 1, 1, length)  # Right-down diagonal.
+            | _any_line(flipped, 1, 1, length))  # Left-down diagonal.
+
+
+def is_full_batch(boards):
+    """Returns a boolean array that is True for each board in `boards` that
+    has no empty spaces."""
+    boards = np.asarray(boards)
+    board_count, height, width = boards.shape
+    return (boards != _tile_value(EMPTY_SPACE, boards)).reshape(board_count, height * width).all(axis=1)
+
+
+def check_boards(boards, length=LINE_LENGTH):
+    """Returns (x_wins, o_wins, full), three boolean arrays with one entry
+    for each board in `boards`."""
+    boards = np.asarray(boards)
+    return (is_winner_batch(PLAYER_X, boards, length), is_winner_batch(PLAYER_O, boards, length),
+            is_full_batch(boards))
@@ -0,0 +1,212 @@
+"""An opening book for the Four-in-a-Row computer player.
+build_book() searches every position up to a given number of moves and
+writes the results to a file as a sorted table of fixed-size records.
+OpeningBook memory-maps that file and binary-searches it, so looking up a
+position takes O(log n) time and never loads the table onto the heap.
+
+A position is keyed by X's BitBoard plus the mask of all tiles. Within a
+column this sum can't carry into the next column and is different for
+every arrangement of tiles, so the key is a perfect hash. A position and
+its left/right mirror image share the smaller of their two keys."""
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+
+import fourinarow
+import fourinarow_ai
+from fourinarow import BOARD_HEIGHT, BOARD_WIDTH, PLAYER_O, PLAYER_X, position_key
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fourinarow_book.bin")
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxI")  # Magic, version, width, height, record count.
+RECORD = struct.Struct("<QiB")  # Position key, score, best column.
+COLUMN_BITS = BOARD_HEIGHT + 1
+COLUMN_MASK = (1 << COLUMN_BITS) - 1
+
+
+def mirror_key(key):
+    """Returns the key of the position flipped left to right."""
+    mirrored = 0
+    for column_index in range(BOARD_WIDTH):
+        column = (key >> (column_index * COLUMN_BITS)) & COLUMN_MASK
+        mirrored |= column << ((BOARD_WIDTH - 1 - column_index) * COLUMN_BITS)
+    return mirrored
+
+
+def canonical_key(x_bits, o_bits):
+    """Returns (key, mirrored), where `key` is shared by the position and
+    its mirror image and `mirrored` is True if it belongs to the mirror."""
+    key = position_key(x_bits, o_bits)
+    flipped_key = mirror_key(key)
+    if flipped_key < key:
+        return flipped_key, True
+    return key, False
+
+
+def _player_to_move(x_bits, o_bits):
+    """Returns the tile whose turn it is. X always moves first."""
+    return PLAYER_X if bin(x_bits).count("1") == bin(o_bits).count("1") else PLAYER_O
+
+
+def _board_from_bits(x_bits, o_bits):
+    """Returns a BitBoard with the given X and O bitboards."""
+    board = fourinarow.BitBoard()
+    board.bits = {PLAYER_X: x_bits, PLAYER_O: o_bits}
+    mask = x_bits | o_bits
+    board.heights = [bin((mask >> (column_index * COLUMN_BITS)) & COLUMN_MASK).count("1")
+                     for column_index in range(BOARD_WIDTH)]
+    board.move_count = sum(board.heights)
+    return board
+
+
+def opening_positions(max_ply):
+    """Returns {canonical key: (x_bits, o_bits)} for every position that can
+    be reached in `max_ply` moves or fewer and where the game isn't over."""
+    positions = {}
+    frontier = [fourinarow.BitBoard()]
+    for ply in range(max_ply + 1):
+        next_frontier = []
+        for board in frontier:
+            key = canonical_key(board.bits[PLAYER_X], board.bits[PLAYER_O])[0]
+            if key in positions:
+                continue  # Already reached by another move order.
+            positions[key] = (board.bits[PLAYER_X], board.bits[PLAYER_O])
+            if ply == max_ply:
+                continue
+            player_tile = _player_to_move(board.bits[PLAYER_X], board.bits[PLAYER_O])
+            for column_index in range(BOARD_WIDTH):
+                if board.landing_space(column_index) is None:
+                    continue
+                next_board = board.copy()
+                next_board.drop(column_index, player_tile)
+                if not next_board.is_winner(player_tile) and not next_board.is_full():
+                    next_frontier.append(next_board)
+        frontier = next_frontier
+    return positions
+
+
+def _evaluate_position(job):
+    """Searches one position and returns its book record."""
+    key, x_bits, o_bits, search_depth = job
+    board = _board_from_bits(x_bits, o_bits)
+    result = fourinarow_ai.choose_move(board, _player_to_move(x_bits, o_bits),
+                                       time_limit=float("inf"), max_depth=search_depth)
+    column = result.column
+    if position_key(x_bits, o_bits) != key:
+        column = BOARD_WIDTH - 1 - column  # The key belongs to the mirror image.
+    return key, result.score, column
+
+
+def build_book(path=BOOK_PATH, max_ply=4, search_depth=8, workers=None):
+    """Searches every position up to `max_ply` moves into the game to
+    `search_depth` moves ahead and writes the results to `path`. Returns
+    the number of positions written."""
+    positions = opening_positions(max_ply)
+    jobs = [(key, x_bits, o_bits, search_depth) for key, (x_bits, o_bits) in positions.items()]
+    if workers == 1:
+        records = [_evaluate_position(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            records = pool.map(_evaluate_position, jobs, chunksize=16)
+    records.sort()  # Sorted by key so the book can be binary-searched.
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, BOARD_WIDTH, BOARD_HEIGHT, len(records)))
+        for record in records:
+            book_file.write(RECORD.pack(*record))
+    return len(records)
+
+
+class OpeningBook:
+    """A read-only, memory-mapped opening book file."""
+
+    def __init__(self, path=BOOK_PATH):
+        with open(path, "rb") as book_file:
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"{path} is too short to be an opening book.")
+        magic, version, width, height, self.record_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} Four-in-a-Row opening book.")
+        if (width, height) != (BOARD_WIDTH, BOARD_HEIGHT):
+            self._map.close()
+            raise ValueError(f"{path} was built for a {width} x {height} board, "
+                             f"not {BOARD_WIDTH} x {BOARD_HEIGHT}.")
+        if len(self._map) != HEADER.size + self.record_count * RECORD.size:
+            self._map.close()
+            raise ValueError(f"{path} is truncated.")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.record_count
+
+    def _find(self, key):
+        """Binary-searches the records for `key` and returns (score, column),
+        or None if it isn't in the book."""
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, score, column = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return score, column
+        return None
+
+    def lookup(self, board, player_tile):
+        """Returns (column, score) for `player_tile` to move on `board`, or
+        None if the position isn't in the book. The score is from the point
+        of view of the player to move, the same as fourinarow_ai scores."""
+        if not isinstance(board, fourinarow.BitBoard):
+            board = fourinarow.BitBoard.from_board(board)
+        x_bits, o_bits = board.bits[PLAYER_X], board.bits[PLAYER_O]
+        if _player_to_move(x_bits, o_bits) != player_tile:
+            return None  # The book only knows whose turn it really is.
+        key, mirrored = canonical_key(x_bits, o_bits)
+        found = self._find(key)
+        if found is None:
+            return None
+        score, column = found
+        if mirrored:
+            column = BOARD_WIDTH - 1 - column
+        return column, score
+
+
+def load_book(path=BOOK_PATH):
+    """Returns the OpeningBook at `path`, or None if there isn't a usable
+    one there."""
+    try:
+        return OpeningBook(path)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    """Builds the opening book from the command line."""
+    parser = argparse.ArgumentParser(description="Build the Four-in-a-Row opening book.")
+    parser.add_argument("--plies", type=int, default=4, help="book positions up to this many moves in")
+    parser.add_argument("--depth", type=int, default=8, help="moves to search ahead from each position")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--output", default=BOOK_PATH)
+    args = parser.parse_args()
+    count = build_book(args.output, args.plies, args.depth, args.workers)
+    print(f"Wrote {count} positions to {args.output}.")
+
+
+# If this program was run (instead of imported), build the book:
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""A load test for fourinarow_server.py.
+Opens many games at once against a server, with both players of every
+game making random moves, and reports the number of moves per second and
+the move latency (from sending MOVE to receiving OK). If no --port is
+given, a server is started in this process on localhost."""
+import argparse
+import asyncio
+import random
+import time
+
+import fourinarow
+import fourinarow_server
+from fourinarow import BOARD_WIDTH, PLAYER_O, PLAYER_X
+
+GAME_OVER_MESSAGES = ("WIN", "TIE", "TIMEOUT", "LEFT")
+
+
+async def play_client(host, port, rng, latencies):
+    """Connects as one player and makes random legal moves until the game
+    is over. Appends the latency of each move to `latencies`."""
+    reader, writer = await asyncio.open_connection(host, port)
+    board = fourinarow.BitBoard()  # The client's own copy of the board.
+    my_tile = other_tile = None
+    sent_at = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = line.decode().split()
+            if message[0] == "START":
+                my_tile = message[1]
+                other_tile = PLAYER_O if my_tile == PLAYER_X else PLAYER_X
+            elif message[0] == "TURN":
+                column = rng.choice([column for column in range(BOARD_WIDTH)
+                                     if board.landing_space(column) is not None])
+                sent_at = time.perf_counter()
+                writer.write(f"MOVE {column + 1}\n".encode())
+                await writer.drain()
+            elif message[0] == "OK":
+                latencies.append(time.perf_counter() - sent_at)
+                board.drop(int(message[1]) - 1, my_tile)
+            elif message[0] == "OPPONENT":
+                board.drop(int(message[1]) - 1, other_tile)
+            elif message[0] in GAME_OVER_MESSAGES:
+                return
+    finally:
+        writer.close()
+
+
+async def run_load_test(games, host, port, seed):
+    """Plays `games` games at once and returns (moves, seconds, latencies)."""
+    rng = random.Random(seed)
+    latencies = []
+    start_time = time.perf_counter()
+    # Two clients per game. The server pairs them up as they connect:
+    await asyncio.gather(*(play_client(host, port, random.Random(rng.getrandbits(64)), latencies)
+                           for client_number in range(2 * games)))
+    return len(latencies), time.perf_counter() - start_time, latencies
+
+
+def percentile(sorted_values, fraction):
+    """Returns the value `fraction` of the way through `sorted_values`."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def load_test(games, host, port, seed):
+    server = None
+    if port is None:  # Start our own server on a free port.
+        server, game_server = await fourinarow_server.start_server(host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        moves, seconds, latencies = await run_load_test(games, host, port, seed)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    latencies.sort()
+    print(f"{games} concurrent games, {moves} moves in {seconds:.2f} seconds.")
+    print(f"{moves / max(seconds, 1e-9):,.0f} moves/sec.")
+    print(f"Move latency: p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {percentile(latencies, 1.0) * 1000:.2f} ms.")
+
+
+def main():
+    """Runs the load test from the command line."""
+    parser = argparse.ArgumentParser(description="Load test the Four-in-a-Row server.")
+    parser.add_argument("games", type=int, nargs="?", default=1000, help="number of concurrent games")
+    parser.add_argument("--host", default=fourinarow_server.HOST)
+    parser.add_argument("--port", type=int, default=None, help="server port (default: start a local server)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(load_test(args.games, args.host, args.port, args.seed))
+
+
+# If this program was run (instead of imported), run the load test:
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""A compact binary format for archives of Four-in-a-Row games.
+An archive file starts with a small header, followed by one record per
+game. Each record is two bytes (the number of moves and the result) and
+then the moves themselves, packed MOVE_BITS bits to a column index: 3 bits
+on the standard 7-column board, so a 42-move game takes 18 bytes.
+
+An archive can also get an index file: a sorted table of (position key,
+record offset) pairs for every position every game reached. It is
+memory-mapped and binary-searched, so finding all the games that reached
+a position doesn't decode the whole archive."""
+import collections
+import mmap
+import struct
+
+import fourinarow
+from fourinarow import BOARD_HEIGHT, BOARD_WIDTH, PLAYER_O, PLAYER_X, position_key
+
+ARCHIVE_MAGIC = b"C4GA"
+INDEX_MAGIC = b"C4GI"
+VERSION = 1
+MOVE_BITS = max(1, (BOARD_WIDTH - 1).bit_length())  # Bits to hold a column index.
+FILE_HEADER = struct.Struct("<4sBBBB")  # Magic, version, width, height, bits per move.
+GAME_HEADER = struct.Struct("<BB")  # Number of moves, result.
+MAX_MOVES = 255  # The most moves the one-byte count in GAME_HEADER can hold.
+INDEX_ENTRY = struct.Struct("<QQ")  # Position key, record offset.
+# The result byte of each game record:
+RESULT_TIE, RESULT_X, RESULT_O, RESULT_UNFINISHED = 0, 1, 2, 3
+RESULTS = {PLAYER_X: RESULT_X, PLAYER_O: RESULT_O}
+
+GameRecord = collections.namedtuple("GameRecord", "offset columns result")
+
+
+class RecordError(Exception):
+    """Raised for archive or index files that are damaged or don't match
+    this board size, and for games that break the rules."""
+    pass
+
+
+def encode_moves(columns):
+    """Packs a sequence of column indexes into bytes, MOVE_BITS apiece."""
+    packed = 0
+    for move_number, column_index in enumerate(columns):
+        packed |= column_index << (move_number * MOVE_BITS)
+    return packed.to_bytes((len(columns) * MOVE_BITS + 7) // 8, "little")
+
+
+def decode_moves(data, move_count):
+    """Unpacks `move_count` column indexes from bytes made by encode_moves()."""
+    packed = int.from_bytes(data, "little")
+    column_mask = (1 << MOVE_BITS) - 1
+    return [(packed >> (move_number * MOVE_BITS)) & column_mask for move_number in range(move_count)]
+
+
+def replay(columns):
+    """Plays `columns` on a new BitBoard, yielding the board after each move,
+    and raises RecordError if a move is illegal or comes after the game
+    was won."""
+    board = fourinarow.BitBoard()
+    player_turn = PLAYER_X
+    for column_index in columns:
+        if not 0 <= column_index < BOARD_WIDTH or board.landing_space(column_index) is None:
+            raise RecordError(f"Move {board.move_count + 1} drops into a full or missing column.")
+        if board.is_winner(PLAYER_X) or board.is_winner(PLAYER_O):
+            raise RecordError(f"Move {board.move_count + 1} comes after the game was won.")
+        board.drop(column_index, player_turn)
+        yield board
+        player_turn = PLAYER_O if player_turn == PLAYER_X else PLAYER_X
+
+
+def game_result(columns):
+    """Returns the result byte for a game made of these moves."""
+    board = fourinarow.BitBoard()
+    for board in replay(columns):
+        pass
+    for player_tile, result in RESULTS.items():
+        if board.is_winner(player_tile):
+            return result
+    return RESULT_TIE if board.is_full() else RESULT_UNFINISHED
+
+
+class GameWriter:
+    """Appends game records to an archive file."""
+
+    def __init__(self, path):
+        self._file = open(path, "ab")
+        try:
+            if self._file.tell() == 0:  # A new archive needs its header.
+                self._file.write(FILE_HEADER.pack(ARCHIVE_MAGIC, VERSION, BOARD_WIDTH, BOARD_HEIGHT, MOVE_BITS))
+            else:
+                with open(path, "rb") as archive_file:
+                    _check_header(archive_file.read(FILE_HEADER.size), ARCHIVE_MAGIC, path)
+        except RecordError:
+            self._file.close()  # Don't leak the file when the archive is rejected.
+            raise
+
+    def write_game(self, columns):
+        """Writes a game, given as a list of column indexes, and returns the
+        offset of its record in the archive."""
+        columns = list(columns)
+        if len(columns) > MAX_MOVES:
+            raise RecordError(f"A game record holds at most {MAX_MOVES} moves, not {len(columns)}.")
+        result = game_result(columns)  # Also checks the moves are legal.
+        offset = self._file.tell()
+        self._file.write(GAME_HEADER.pack(len(columns), result) + encode_moves(columns))
+        return offset
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _check_header(header, magic, path):
+    """Raises RecordError if `header` isn't a FILE_HEADER for this board."""
+    if len(header) != FILE_HEADER.size:
+        raise RecordError(f"{path} is too short to be an archive or index.")
+    file_magic, version, width, height, move_bits = FILE_HEADER.unpack(header)
+    if file_magic != magic or version != VERSION:
+        raise RecordError(f"{path} is not a version {VERSION} file of this kind.")
+    if (width, height, move_bits) != (BOARD_WIDTH, BOARD_HEIGHT, MOVE_BITS):
+        raise RecordError(f"{path} was written for a {width} x {height} board.")
+
+
+def _read_record(archive_file):
+    """Reads the game record at the current position of `archive_file`, or
+    returns None at the end of the file."""
+    offset = archive_file.tell()
+    header = archive_file.read(GAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) != GAME_HEADER.size:
+        raise RecordError(f"The record at offset {offset} is cut off.")
+    move_count, result = GAME_HEADER.unpack(header)
+    data_size = (move_count * MOVE_BITS + 7) // 8
+    data = archive_file.read(data_size)
+    if len(data) != data_size:
+        raise RecordError(f"The record at offset {offset} is cut off.")
+    return GameRecord(offset, decode_moves(data, move_count), result)
+
+
+def read_games(path):
+    """Yields a GameRecord for each game in the archive at `path`, reading
+    one record at a time."""
+    with open(path, "rb") as archive_file:
+        _check_header(archive_file.read(FILE_HEADER.size), ARCHIVE_MAGIC, path)
+        while True:
+            record = _read_record(archive_file)
+            if record is None:
+                return
+            yield record
+
+
+def read_game(path, offset):
+    """Returns the GameRecord at `offset` in the archive at `path`."""
+    with open(path, "rb") as archive_file:
+        _check_header(archive_file.read(FILE_HEADER.size), ARCHIVE_MAGIC, path)
+        archive_file.seek(offset)
+        record = _read_record(archive_file)
+    if record is None:
+        raise RecordError(f"There is no record at offset {offset}.")
+    return record
+
+
+def build_index(archive_path, index_path):
+    """Writes an index of every position reached by every game in the
+    archive. Returns the number of index entries."""
+    entries = []
+    for record in read_games(archive_path):
+        entries.append((0, record.offset))  # Every game starts from the empty board.
+        for board in replay(record.columns):
+            entries.append((position_key(board.bits[PLAYER_X], board.bits[PLAYER_O]), record.offset))
+    entries.sort()
+    with open(index_path, "wb") as index_file:
+        index_file.write(FILE_HEADER.pack(INDEX_MAGIC, VERSION, BOARD_WIDTH, BOARD_HEIGHT, MOVE_BITS))
+        for entry in entries:
+            index_file.write(INDEX_ENTRY.pack(*entry))
+    return len(entries)
+
+
+class ArchiveIndex:
+    """A memory-mapped index made by build_index()."""
+
+    def __init__(self, index_path):
+        with open(index_path, "rb") as index_file:
+            _check_header(index_file.read(FILE_HEADER.size), INDEX_MAGIC, index_path)
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entry_count, extra = divmod(len(self._map) - FILE_HEADER.size, INDEX_ENTRY.size)
+        if extra:
+            self._map.close()
+            raise RecordError(f"{index_path} is truncated.")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _key_at(self, entry_number):
+        return INDEX_ENTRY.unpack_from(self._map, FILE_HEADER.size + entry_number * INDEX_ENTRY.size)
+
+    def find_offsets(self, board):
+        """Returns the archive offsets of every game that reached the same
+        position as `board` (a dictionary board, TrackedBoard or BitBoard)."""
+        if not isinstance(board, fourinarow.BitBoard):
+            board = fourinarow.BitBoard.from_board(board)
+        key = position_key(board.bits[PLAYER_X], board.bits[PLAYER_O])
+        low, high = 0, self.entry_count
+        while low < high:  # Find the first entry with this key.
+            middle = (low + high) // 2
+            if self._key_at(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        while low < self.entry_count:
+            entry_key, offset = self._key_at(low)
+            if entry_key != key:
+                break
+            offsets.append(offset)
+            low += 1
+        return offsets
+
+
+def games_reaching(archive_path, index, board):
+    """Yields the GameRecord of every game in the archive that reached the
+    same position as `board`, using an ArchiveIndex to find them."""
+    with open(archive_path, "rb") as archive_file:
+        _check_header(archive_file.read(FILE_HEADER.size), ARCHIVE_MAGIC, archive_path)
+        for offset in index.find_offsets(board):
+            archive_file.seek(offset)
+            yield _read_record(archive_file)
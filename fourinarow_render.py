@@ -0,0 +1,120 @@
+"""A terminal renderer for watching Four-in-a-Row games quickly.
+display_board() prints the whole board for every move. DiffRenderer draws
+the board once, remembers what is on the screen, and after that only sends
+ANSI cursor moves to the cells that changed, all in a single write per
+frame. Frames are capped at a frame rate: moves that come in faster than
+that are drawn together in the next frame, so replays of thousands of
+moves run as fast as the game records can be read."""
+import argparse
+import sys
+import time
+
+import fourinarow
+import fourinarow_records
+from fourinarow import BOARD_HEIGHT, BOARD_TEMPLATE, BOARD_WIDTH, PLAYER_O, PLAYER_X
+
+FPS = 30.0
+# Screen lines (counting from 1) of the board, from BOARD_TEMPLATE's
+# layout: a blank line, the column labels and the top edge come first.
+FIRST_ROW_LINE = 4
+STATUS_LINE = FIRST_ROW_LINE + BOARD_HEIGHT + 1  # Just below the bottom edge.
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_LINE = "\x1b[K"
+
+
+def move_cursor(line, column):
+    """Returns the ANSI code to move the cursor to a screen position."""
+    return f"\x1b[{line};{column}H"
+
+
+class DiffRenderer:
+    """Draws boards by only updating the cells that changed since the last
+    frame. `out` can be any text file object, such as sys.stdout or a
+    socket file for a spectator."""
+
+    def __init__(self, out=sys.stdout, fps=FPS):
+        self.out = out
+        self.frame_time = 1 / fps if fps else 0.0  # An fps of 0 means no cap.
+        self.next_frame_at = 0.0
+        self.screen_tiles = None  # The tiles currently on the screen.
+        self.screen_status = ""
+        self.frames_drawn = 0
+
+    def reset(self):
+        """Forgets what is on the screen, so the next frame is drawn whole."""
+        self.screen_tiles = None
+
+    def render(self, board, status="", force=False):
+        """Draws `board` with a status line under it. Unless `force` is True,
+        nothing is drawn if the last frame was too recent. Returns True if a
+        frame was drawn."""
+        now = time.perf_counter()
+        if not force and now < self.next_frame_at:
+            return False  # The changes will be drawn with the next frame.
+        self.next_frame_at = now + self.frame_time
+        tiles = [board[(column_index, row_index)]
+                 for row_index in range(BOARD_HEIGHT) for column_index in range(BOARD_WIDTH)]
+        if self.screen_tiles is None:
+            parts = [CLEAR_SCREEN, BOARD_TEMPLATE.format(*tiles), "\n", status, "\n"]
+        else:
+            parts = []
+            for cell_index, tile in enumerate(tiles):
+                if tile != self.screen_tiles[cell_index]:
+                    row_index, column_index = divmod(cell_index, BOARD_WIDTH)
+                    # +2 skips the "|" on the left edge (screen columns start at 1):
+                    parts.append(move_cursor(FIRST_ROW_LINE + row_index, column_index + 2) + tile)
+            if status != self.screen_status:
+                parts.append(move_cursor(STATUS_LINE, 1) + CLEAR_LINE + status)
+            parts.append(move_cursor(STATUS_LINE + 1, 1))  # Park the cursor below the board.
+        self.out.write("".join(parts))  # One write and one flush per frame.
+        self.out.flush()
+        self.screen_tiles = tiles
+        self.screen_status = status
+        self.frames_drawn += 1
+        return True
+
+
+def replay_games(records, renderer, moves_per_second=None):
+    """Replays GameRecords through `renderer`. If `moves_per_second` is None,
+    moves are replayed as fast as possible and only drawn at the renderer's
+    frame rate. Returns the number of moves replayed."""
+    move_total = 0
+    start_time = time.perf_counter()
+    board, status = None, ""
+    for game_number, record in enumerate(records, 1):
+        board = fourinarow.BitBoard()
+        for move_number, board in enumerate(fourinarow_records.replay(record.columns), 1):
+            move_total += 1
+            if moves_per_second:
+                delay = start_time + move_total / moves_per_second - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            renderer.render(board, f"Game {game_number}, move {move_number}")
+        if board.is_winner(PLAYER_X) or board.is_winner(PLAYER_O):
+            result = f"{PLAYER_X if board.is_winner(PLAYER_X) else PLAYER_O} won"
+        else:
+            result = "tie" if board.is_full() else "unfinished"
+        status = f"Game {game_number}: {result} after {board.move_count} moves."
+        renderer.render(board, status)
+    if board is not None:
+        renderer.render(board, status, force=True)  # Always show how the last game ended.
+    return move_total
+
+
+def main():
+    """Replays an archive of games from the command line."""
+    parser = argparse.ArgumentParser(description="Replay a Four-in-a-Row game archive in the terminal.")
+    parser.add_argument("archive", help="an archive written by fourinarow_records.GameWriter")
+    parser.add_argument("--fps", type=float, default=FPS, help="most frames to draw per second (0: no cap)")
+    parser.add_argument("--speed", type=float, default=None, help="moves per second (default: no limit)")
+    args = parser.parse_args()
+    renderer = DiffRenderer(sys.stdout, args.fps)
+    start_time = time.perf_counter()
+    move_total = replay_games(fourinarow_records.read_games(args.archive), renderer, args.speed)
+    seconds = time.perf_counter() - start_time
+    print(f"Replayed {move_total} moves in {seconds:.2f} seconds with {renderer.frames_drawn} frames.")
+
+
+# If this program was run (instead of imported), run the replay:
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Headless self-play for Four-in-a-Row.
+Plays many games between two strategies across a process pool and adds up
+the wins, ties and game lengths. Every game gets its own seed made from the
+base seed and the game's number, so the results are the same no matter how
+many worker processes run them."""
+import argparse
+import collections
+import multiprocessing
+import random
+import time
+
+import fourinarow
+from fourinarow import BOARD_WIDTH, PLAYER_O, PLAYER_X
+
+
+def random_strategy(board, player_tile, rng):
+    """Drops into any column that isn't full."""
+    return rng.choice([column for column in range(BOARD_WIDTH) if board.landing_space(column) is not None])
+
+
+def heuristic_strategy(board, player_tile, rng):
+    """Wins if it can, blocks the opponent if it must, and otherwise prefers
+    columns near the center."""
+    other_tile = PLAYER_O if player_tile == PLAYER_X else PLAYER_X
+    columns = [column for column in range(BOARD_WIDTH) if board.landing_space(column) is not None]
+    for tile in (player_tile, other_tile):  # First look for a win, then a block.
+        for column in columns:
+            test_board = board.copy()
+            test_board.drop(column, tile)
+            if test_board.is_winner(tile):
+                return column
+    weights = [BOARD_WIDTH - abs(2 * column - (BOARD_WIDTH - 1)) for column in columns]
+    return rng.choices(columns, weights)[0]
+
+
+def ai_strategy(board, player_tile, rng):
+    """Asks fourinarow_ai for its move with a short time budget."""
+    import fourinarow_ai  # Only imported by the workers that need it.
+    return fourinarow_ai.choose_move(board, player_tile, time_limit=0.01).column
+
+
+STRATEGIES = {"random": random_strategy, "heuristic": heuristic_strategy, "ai": ai_strategy}
+
+
+def play_game(x_strategy, o_strategy, seed):
+    """Plays one game and returns (winner, move_count). The winner is
+    PLAYER_X, PLAYER_O, or None for a tie."""
+    rng = random.Random(seed)
+    board = fourinarow.BitBoard()
+    strategies = {PLAYER_X: STRATEGIES[x_strategy], PLAYER_O: STRATEGIES[o_strategy]}
+    player_turn = PLAYER_X
+    while True:
+        board.drop(strategies[player_turn](board, player_turn, rng), player_turn)
+        if board.is_winner(player_turn):
+            return player_turn, board.move_count
+        elif board.is_full():
+            return None, board.move_count
+        player_turn = PLAYER_O if player_turn == PLAYER_X else PLAYER_X
+
+
+def play_games(job):
+    """Plays the games numbered `first_game` up to `last_game` in one worker
+    process and returns a Counter of (winner, move_count) results."""
+    x_strategy, o_strategy, seed, first_game, last_game = job
+    results = collections.Counter()
+    for game_number in range(first_game, last_game):
+        results[play_game(x_strategy, o_strategy, seed * 1_000_003 + game_number)] += 1
+    return results
+
+
+def simulate(games, x_strategy="random", o_strategy="random", workers=None, seed=0, chunk_size=None):
+    """Plays `games` games on `workers` processes (all CPUs by default) and
+    returns a dictionary of statistics about them."""
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, games // (workers * 4) or 1))  # A few jobs per worker.
+    jobs = [(x_strategy, o_strategy, seed, first_game, min(first_game + chunk_size, games))
+            for first_game in range(0, games, chunk_size)]
+    start_time = time.perf_counter()
+    results = collections.Counter()
+    if workers == 1:
+        for job in jobs:
+            results.update(play_games(job))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for job_results in pool.imap_unordered(play_games, jobs):
+                results.update(job_results)
+    seconds = time.perf_counter() - start_time
+
+    lengths = collections.Counter()
+    wins = {PLAYER_X: 0, PLAYER_O: 0, None: 0}
+    for (winner, move_count), count in results.items():
+        wins[winner] += count
+        lengths[move_count] += count
+    return {
+        "games": games,
+        "workers": workers,
+        "x_wins": wins[PLAYER_X],
+        "o_wins": wins[PLAYER_O],
+        "ties": wins[None],
+        "average_length": sum(length * count for length, count in lengths.items()) / games if games else 0.0,
+        "lengths": dict(sorted(lengths.items())),
+        "seconds": seconds,
+        "games_per_second": games / seconds if seconds else 0.0,
+    }
+
+
+def report_scaling(games, x_strategy="random", o_strategy="random", worker_counts=None, seed=0):
+    """Plays the same games with more and more workers and prints how the
+    games/sec rate scales compared to one worker."""
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= multiprocessing.cpu_count():
+            worker_counts.append(worker_counts[-1] * 2)
+    print("workers  games/sec  speedup")
+    base_rate = None
+    for workers in worker_counts:
+        stats = simulate(games, x_strategy, o_strategy, workers, seed)
+        if base_rate is None:
+            base_rate = stats["games_per_second"]
+        print(f"{workers:7}  {stats['games_per_second']:9,.0f}  {stats['games_per_second'] / base_rate:6.2f}x")
+
+
+def main():
+    """Runs a batch of games from the command line and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("games", type=int, help="number of games to play")
+    parser.add_argument("-x", default="random", choices=STRATEGIES, help="strategy for player X")
+    parser.add_argument("-o", default="random", choices=STRATEGIES, help="strategy for player O")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scaling", action="store_true", help="report games/sec for 1, 2, 4... workers")
+    args = parser.parse_args()
+    if args.scaling:
+        report_scaling(args.games, args.x, args.o, seed=args.seed)
+        return
+    stats = simulate(args.games, args.x, args.o, args.workers, args.seed)
+    print(f"{stats['games']} games of {args.x} (X) against {args.o} (O) on {stats['workers']} workers:")
+    print(f"X won {stats['x_wins']}, O won {stats['o_wins']}, {stats['ties']} ties.")
+    print(f"Games lasted {stats['average_length']:.1f} moves on average.")
+    print(f"{stats['games_per_second']:,.0f} games/sec.")
+
+
+# If this program was run (instead of imported), run the simulation:
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""A Four-in-a-Row server that hosts many games at once with asyncio.
+Players connect over TCP and are paired up in the order they arrive. The
+game rules come from fourinarow.py; this module only moves lines of text
+between the players and the board, so no game ever blocks the event loop.
+
+The protocol is one line of text per message. The server sends:
+    WAIT            Waiting for an opponent to connect.
+    START X         The game has started and you are playing X (or O).
+    TURN            It is your turn to move.
+    OK 4            Your tile was dropped into column 4.
+    OPPONENT 4      Your opponent dropped a tile into column 4.
+    ERROR message   That wasn't a legal move (or it isn't your turn). Send
+                    another one.
+    BOARD ...       The board's rows from top to bottom, separated by "/".
+    WIN X           X has won (or O has). The game is over.
+    TIE             The board is full. The game is over.
+    TIMEOUT X       X took too long to move and forfeits. The game is over.
+    LEFT            Your opponent disconnected, quit or sent a line longer
+                    than the stream limit. The game is over.
+The client sends:
+    MOVE 4          Drop a tile into column 4.
+    BOARD           Ask for the current board.
+    QUIT            Leave the game."""
+import argparse
+import asyncio
+
+import fourinarow
+from fourinarow import BOARD_HEIGHT, BOARD_WIDTH, PLAYER_O, PLAYER_X
+
+HOST = "127.0.0.1"
+PORT = 4004
+MOVE_TIMEOUT = 30.0  # Seconds a player has to send each move.
+MAX_QUEUED_LINES = 100  # A client that sends more lines than this without them being read is dropped.
+
+
+class Player:
+    """One connected client."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        # Set when the player's game is over, so the connection can close:
+        self.finished = asyncio.get_running_loop().create_future()
+        self.lines = asyncio.Queue()  # Lines from the client, then None once it has gone.
+        self.gone = False  # True once the client has disconnected or broken the protocol.
+        self.error = None  # Why the client was dropped, if it broke the protocol.
+        self.reading = asyncio.create_task(self.read_lines())
+
+    async def read_lines(self):
+        """Reads lines from the client into self.lines for as long as it is
+        connected, so a disconnect is noticed even when it isn't this
+        player's turn, or while they are waiting for an opponent."""
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break  # The client disconnected.
+                if self.lines.qsize() >= MAX_QUEUED_LINES:
+                    self.error = "Too many lines sent at once."
+                    break
+                self.lines.put_nowait(line)
+        except ValueError:  # Raised (as LimitOverrunError) for a line longer than the stream's limit.
+            self.error = "Line too long."
+        except ConnectionError:
+            pass
+        self.gone = True
+        self.lines.put_nowait(None)
+
+    async def send(self, *lines):
+        """Sends lines of text to the client, ignoring clients that have
+        already disconnected."""
+        try:
+            self.writer.write("".join(line + "\n" for line in lines).encode())
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+    def finish(self):
+        if not self.finished.done():
+            self.finished.set_result(None)
+
+
+def board_rows(board):
+    """Returns the board as a single line: its rows from top to bottom,
+    separated by "/"."""
+    return "/".join("".join(board[(column_index, row_index)] for column_index in range(BOARD_WIDTH))
+                    for row_index in range(BOARD_HEIGHT))
+
+
+class GameServer:
+    """Pairs up connecting players and runs a game for each pair."""
+
+    def __init__(self, move_timeout=MOVE_TIMEOUT):
+        self.move_timeout = move_timeout
+        self.waiting_player = None
+        self.games = set()  # Running game tasks, so they aren't garbage collected.
+        self.games_played = 0
+
+    async def handle_client(self, reader, writer):
+        """Called by asyncio for each new connection."""
+        player = Player(reader, writer)
+        if self.waiting_player is not None and self.waiting_player.gone:
+            self.drop_waiting_player(self.waiting_player)
+        if self.waiting_player is None:
+            self.waiting_player = player
+            player.reading.add_done_callback(lambda task: self.drop_waiting_player(player))
+            await player.send("WAIT")
+        else:
+            first_player, self.waiting_player = self.waiting_player, None
+            game = asyncio.create_task(self.run_game(first_player, player))
+            self.games.add(game)
+            game.add_done_callback(self.games.discard)
+        await player.finished
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def drop_waiting_player(self, player):
+        """Stops waiting for an opponent for a player who has left."""
+        if self.waiting_player is player:
+            self.waiting_player = None
+            player.finish()
+
+    async def run_game(self, first_player, second_player):
+        """Plays one game between two connected players."""
+        players = {PLAYER_X: first_player, PLAYER_O: second_player}
+        try:
+            await first_player.send(f"START {PLAYER_X}")
+            await second_player.send(f"START {PLAYER_O}")
+            await self.play(players, fourinarow.BitBoard())
+        finally:
+            self.games_played += 1
+            first_player.finish()
+            second_player.finish()
+
+    async def play(self, players, board):
+        """Runs turns until the game is over. Both players' lines are read
+        all the time, so the player who is waiting can still ask for the
+        board, quit or disconnect."""
+        loop = asyncio.get_running_loop()
+        player_turn = PLAYER_X
+        need_turn_message = True
+        reads = {}  # Each player -> the task getting their next line.
+        try:
+            while True:
+                other_tile = PLAYER_O if player_turn == PLAYER_X else PLAYER_X
+                player, opponent = players[player_turn], players[other_tile]
+                if need_turn_message:
+                    await player.send("TURN")
+                    deadline = loop.time() + self.move_timeout
+                for each_player in (player, opponent):
+                    if each_player not in reads:
+                        reads[each_player] = asyncio.create_task(each_player.lines.get())
+                done, pending = await asyncio.wait(reads.values(), timeout=max(0.0, deadline - loop.time()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    await player.send(f"TIMEOUT {player_turn}")
+                    await opponent.send(f"TIMEOUT {player_turn}")
+                    return
+                need_turn_message = False  # Still waiting for the same move, unless one is made below.
+                if reads[opponent] in done:
+                    line = reads.pop(opponent).result()
+                    if await self.handle_out_of_turn(opponent, player, line, board):
+                        return
+                    continue
+                line = reads.pop(player).result()  # The deadline stays: only a move stops the clock.
+                command = line.decode(errors="replace").upper().split() if line else None
+                if command is None or command == ["QUIT"]:
+                    await self.leave(player, opponent)
+                    return
+                if command == ["BOARD"]:
+                    await player.send("BOARD " + board_rows(board))
+                    continue
+                try:
+                    if len(command) != 2 or command[0] != "MOVE":
+                        raise ValueError("Send MOVE followed by a column number.")
+                    space = fourinarow.parse_move(command[1], board)
+                except ValueError as error:
+                    await player.send(f"ERROR {error}")
+                    continue
+                board[space] = player_turn
+                await player.send(f"OK {command[1]}")
+                await opponent.send(f"OPPONENT {command[1]}")
+                if fourinarow.is_winner(player_turn, board):
+                    await player.send(f"WIN {player_turn}")
+                    await opponent.send(f"WIN {player_turn}")
+                    return
+                elif fourinarow.is_full(board):
+                    await player.send("TIE")
+                    await opponent.send("TIE")
+                    return
+                player_turn = other_tile
+                need_turn_message = True
+        finally:
+            for read in reads.values():
+                read.cancel()
+
+    async def handle_out_of_turn(self, player, opponent, line, board):
+        """Answers a line from the player who isn't moving. Returns True if
+        they left, which ends the game."""
+        command = line.decode(errors="replace").upper().split() if line else None
+        if command is None or command == ["QUIT"]:
+            await self.leave(player, opponent)
+            return True
+        if command == ["BOARD"]:
+            await player.send("BOARD " + board_rows(board))
+        else:
+            await player.send("ERROR Wait for your turn.")
+        return False
+
+    async def leave(self, player, opponent):
+        """Ends the game because `player` quit, disconnected or broke the
+        protocol."""
+        if player.error:
+            await player.send(f"ERROR {player.error}")
+        await opponent.send("LEFT")
+
+
+async def start_server(host=HOST, port=PORT, move_timeout=MOVE_TIMEOUT):
+    """Starts listening and returns (asyncio server, GameServer)."""
+    game_server = GameServer(move_timeout)
+    server = await asyncio.start_server(game_server.handle_client, host, port, backlog=4096)
+    return server, game_server
+
+
+async def serve(host, port, move_timeout):
+    server, game_server = await start_server(host, port, move_timeout)
+    print(f"Four-in-a-Row server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """Runs the server from the command line."""
+    parser = argparse.ArgumentParser(description="Host Four-in-a-Row games over TCP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--timeout", type=float, default=MOVE_TIMEOUT, help="seconds allowed per move")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.timeout))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+# If this program was run (instead of imported), run the server:
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""A terminal renderer for animating long Tower of Hanoi solutions, and the
+one place the towers are drawn: display_towers() in towerofhanoi.py prints
+get_towers_str() too. The strings for every disk width are made once per
+number of disks, each frame is joined into one string, and FrameRenderer
+writes it with a single write. Frames are capped at a frame rate: moves that come in
+faster than that are shown together in the next frame, so even the
+1,048,575 moves for 20 disks can be animated at terminal speed."""
+import argparse
+import functools
+import sys
+import time
+
+import hanoi_solver
+
+FPS = 30.0
+HOME = "\x1b[H"  # Moves the cursor to the top left, to draw over the last frame.
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_LINE = "\x1b[K"
+
+
+@functools.lru_cache(maxsize=None)
+def disk_strings(total_disks):
+    """Returns a tuple of the strings for disks of width 0 (the bare pole)
+    to `total_disks`, each padded to the same width and labeled with its
+    width, such as "  @@_2@@  "."""
+    strings = []
+    for width in range(total_disks + 1):
+        empty_space = " " * (total_disks - width)
+        if width == 0:
+            strings.append(f"{empty_space}||{empty_space}")
+        else:
+            disk = "@" * width
+            strings.append(f"{empty_space}{disk}{str(width).rjust(2, '_')}{disk}{empty_space}")
+    return tuple(strings)
+
+
+@functools.lru_cache(maxsize=None)
+def tower_labels(total_disks):
+    """Returns the line of tower labels under the towers."""
+    empty_space = " " * total_disks
+    return "{0} A{0}{0} B{0}{0} C\n".format(empty_space)
+
+
+def get_towers_str(towers, total_disks):
+    """Returns the text that display_towers() prints for the towers."""
+    strings = disk_strings(total_disks)
+    tower_a, tower_b, tower_c = towers["A"], towers["B"], towers["C"]
+    lines = []
+    for level in range(total_disks, -1, -1):
+        lines.append(strings[tower_a[level] if level < len(tower_a) else 0]
+                     + strings[tower_b[level] if level < len(tower_b) else 0]
+                     + strings[tower_c[level] if level < len(tower_c) else 0])
+    lines.append(tower_labels(total_disks))
+    return "\n".join(lines) + "\n"
+
+
+class FrameRenderer:
+    """Draws the towers in one write per frame, over the top of the last
+    frame. `out` can be any text file object, such as sys.stdout."""
+
+    def __init__(self, total_disks, out=sys.stdout, fps=FPS):
+        self.total_disks = total_disks
+        self.out = out
+        self.frame_time = 1 / fps if fps else 0.0  # An fps of 0 means no cap.
+        self.next_frame_at = 0.0
+        self.cleared = False
+        self.frames_drawn = 0
+
+    def render(self, towers, status="", force=False):
+        """Draws `towers` with a status line under them. Unless `force` is
+        True, nothing is drawn if the last frame was too recent. Returns True
+        if a frame was drawn."""
+        now = time.perf_counter()
+        if not force and now < self.next_frame_at:
+            return False  # The changes will be drawn with the next frame.
+        self.next_frame_at = now + self.frame_time
+        start = HOME if self.cleared else CLEAR_SCREEN
+        self.out.write(start + get_towers_str(towers, self.total_disks) + status + CLEAR_LINE + "\n")
+        self.out.flush()  # One write and one flush per frame.
+        self.cleared = True
+        self.frames_drawn += 1
+        return True
+
+
+def animate_solution(total_disks, renderer, moves_per_second=None):
+    """Plays the optimal solution for `total_disks` disks through `renderer`.
+    If `moves_per_second` is None, moves are made as fast as possible and
+    only drawn at the renderer's frame rate. Returns the number of moves."""
+    towers = {"A": list(range(total_disks, 0, -1)), "B": [], "C": []}
+    move_total = 2 ** total_disks - 1
+    start_time = time.perf_counter()
+    renderer.render(towers, f"Move 0 of {move_total:,}", force=True)
+    for move_number, (from_tower, to_tower) in enumerate(hanoi_solver.solution_moves(total_disks), 1):
+        towers[to_tower].append(towers[from_tower].pop())
+        if moves_per_second:
+            delay = start_time + move_number / moves_per_second - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        renderer.render(towers, f"Move {move_number:,} of {move_total:,}: {from_tower}{to_tower}")
+    renderer.render(towers, f"Solved in {move_total:,} moves.", force=True)  # Always show the end.
+    return move_total
+
+
+def main():
+    """Animates a solution from the command line."""
+    parser = argparse.ArgumentParser(description="Animate a Tower of Hanoi solution in the terminal.")
+    parser.add_argument("--disks", type=int, default=20, help="number of disks (default: 20)")
+    parser.add_argument("--fps", type=float, default=FPS, help="most frames to draw per second (0: no cap)")
+    parser.add_argument("--speed", type=float, default=None, help="moves per second (default: no limit)")
+    args = parser.parse_args()
+    renderer = FrameRenderer(args.disks, sys.stdout, args.fps)
+    start_time = time.perf_counter()
+    move_total = animate_solution(args.disks, renderer, args.speed)
+    seconds = time.perf_counter() - start_time
+    print(f"Played {move_total:,} moves in {seconds:.2f} seconds with {renderer.frames_drawn} frames.")
+
+
+# If this program was run (instead of imported), run the animation:
+if __name__ == "__main__":
+    main()
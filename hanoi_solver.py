@@ -0,0 +1,223 @@
+"""Optimal solutions for The Tower of Hanoi, computed with bit arithmetic.
+The optimal solution for n disks has 2**n - 1 moves. Rather than recursing,
+move number m is worked out from m's bits alone: disk number (trailing
+zero bits of m) + 1 moves, from tower (m & (m - 1)) % 3 to tower
+((m | (m - 1)) + 1) % 3, counting towers in the order the disks travel.
+So the solution can be streamed with nothing but a counter, any move can
+be found directly, and so can the whole position after any number of
+moves. This works the same for 3 disks as for 64.
+
+shortest_solution() finds the fewest moves from any legal position, and
+frame_stewart_moves() solves the puzzle with more than three towers.
+
+Towers are named "A", "B" and "C" and described with lists of disks from
+the bottom up, like the towers dictionary in towerofhanoi.py."""
+import functools
+import random
+import time
+
+
+def _tower_order(total_disks, from_tower, to_tower, spare_tower):
+    """Returns the towers in the order used by the move formulas. With an
+    odd number of disks the smallest disk cycles from -> to -> spare, and
+    with an even number it cycles from -> spare -> to. The formulas move it
+    from index 0 to index 2 first, which is the opposite way round."""
+    if total_disks % 2 == 1:
+        return (from_tower, spare_tower, to_tower)
+    return (from_tower, to_tower, spare_tower)
+
+
+def moved_disk(move_number):
+    """Returns the disk (1 is the smallest) that move number `move_number`
+    (counting from 1) of an optimal solution moves."""
+    return (move_number & -move_number).bit_length()
+
+
+def kth_move(total_disks, move_number, from_tower="A", to_tower="C", spare_tower="B"):
+    """Returns (from_tower, to_tower) for move number `move_number`, counting
+    from 1, of the optimal solution for `total_disks` disks."""
+    if not 1 <= move_number < 2 ** total_disks:
+        raise ValueError(f"There are only {2 ** total_disks - 1} moves for {total_disks} disks.")
+    towers = _tower_order(total_disks, from_tower, to_tower, spare_tower)
+    return towers[(move_number & (move_number - 1)) % 3], towers[((move_number | (move_number - 1)) + 1) % 3]
+
+
+def solution_moves(total_disks, from_tower="A", to_tower="C", spare_tower="B", start=1):
+    """Yields the (from_tower, to_tower) moves of the optimal solution, one
+    at a time, beginning with move number `start`. Only a move counter is
+    kept, so even the 2**64 - 1 moves for 64 disks can be streamed."""
+    towers = _tower_order(total_disks, from_tower, to_tower, spare_tower)
+    for move_number in range(start, 2 ** total_disks):
+        yield towers[(move_number & (move_number - 1)) % 3], towers[((move_number | (move_number - 1)) + 1) % 3]
+
+
+def disk_towers_after(total_disks, moves_made, from_tower="A", to_tower="C", spare_tower="B"):
+    """Returns a list of the tower each disk is on after `moves_made` moves of
+    the optimal solution. Index 0 is for disk 1, the smallest disk.
+
+    The largest disk only moves at move 2**(n-1), so bit n-1 of moves_made
+    says whether it has moved yet. The disks above it are in the middle of
+    moving from `from_tower` to the spare tower (before) or from the spare
+    tower to `to_tower` (after), so each smaller disk takes one bit."""
+    if not 0 <= moves_made < 2 ** total_disks:
+        raise ValueError(f"There are only {2 ** total_disks - 1} moves for {total_disks} disks.")
+    disk_towers = [None] * total_disks
+    for disk in range(total_disks, 0, -1):
+        if moves_made >> (disk - 1) & 1:
+            disk_towers[disk - 1] = to_tower
+            from_tower, spare_tower = spare_tower, from_tower
+        else:
+            disk_towers[disk - 1] = from_tower
+            to_tower, spare_tower = spare_tower, to_tower
+    return disk_towers
+
+
+def towers_after(total_disks, moves_made, from_tower="A", to_tower="C", spare_tower="B"):
+    """Returns the towers dictionary, as used by towerofhanoi.py, after
+    `moves_made` moves of the optimal solution."""
+    disk_towers = disk_towers_after(total_disks, moves_made, from_tower, to_tower, spare_tower)
+    towers = {from_tower: [], to_tower: [], spare_tower: []}
+    for disk in range(total_disks, 0, -1):  # Largest disks go on the bottom.
+        towers[disk_towers[disk - 1]].append(disk)
+    return towers
+
+
+def _other_tower(tower1, tower2, towers="ABC"):
+    """Returns the one tower of three that is neither tower1 nor tower2."""
+    for tower in towers:
+        if tower != tower1 and tower != tower2:
+            return tower
+
+
+def _disk_towers(towers):
+    """Returns a list of the tower each disk is on, index 0 for disk 1."""
+    disk_towers = [None] * sum(len(tower) for tower in towers.values())
+    for name, tower in towers.items():
+        for disk in tower:
+            disk_towers[disk - 1] = name
+    return disk_towers
+
+
+def shortest_solution_length(towers, to_tower):
+    """Returns the fewest moves needed to get every disk onto `to_tower`
+    from the position in the towers dictionary. This takes O(n) time."""
+    disk_towers = _disk_towers(towers)
+    move_count = 0
+    target = to_tower
+    for disk in range(len(disk_towers), 0, -1):
+        if disk_towers[disk - 1] != target:
+            # Move the smaller disks out of the way, move this disk, then
+            # move the smaller disks on top of it: 2**(disk-1) moves after
+            # the smaller disks have reached the third tower.
+            move_count += 2 ** (disk - 1)
+            target = _other_tower(disk_towers[disk - 1], target, towers)
+    return move_count
+
+
+def _gather_disks(disk_towers, disk, target, tower_names):
+    """Yields the fewest moves that put disks 1 to `disk` onto `target`."""
+    while disk > 0 and disk_towers[disk - 1] == target:
+        disk -= 1  # This disk is already in place, and won't have to move.
+    if disk == 0:
+        return
+    source = disk_towers[disk - 1]
+    spare = _other_tower(source, target, tower_names)
+    # Get the smaller disks out of the way onto the spare tower, move this
+    # disk, then move the now-complete smaller tower on top of it:
+    yield from _gather_disks(disk_towers, disk - 1, spare, tower_names)
+    yield source, target
+    yield from solution_moves(disk - 1, spare, target, source)
+
+
+def shortest_solution(towers, to_tower):
+    """Yields the fewest (from_tower, to_tower) moves that get every disk
+    onto `to_tower`, starting from any legal towers dictionary. Moves are
+    made as they are needed, so long solutions don't fill up memory."""
+    disk_towers = _disk_towers(towers)
+    return _gather_disks(disk_towers, len(disk_towers), to_tower, "".join(towers))
+
+
+def best_continuation(towers, start_tower="A"):
+    """Returns (to_tower, move_count) for the quickest way to finish the game
+    in towerofhanoi.py, where the puzzle is solved once every disk is on any
+    tower other than `start_tower`."""
+    return min(((to_tower, shortest_solution_length(towers, to_tower)) for to_tower in towers
+                if to_tower != start_tower), key=lambda option: option[1])
+
+
+@functools.lru_cache(maxsize=None)
+def frame_stewart(total_disks, total_towers):
+    """Returns (move_count, split) for moving `total_disks` disks with
+    `total_towers` towers with the Frame-Stewart algorithm: move the
+    `split` smallest disks onto a spare tower using every tower, move the
+    rest using one tower fewer, then move the smallest disks back on top.
+    The best split for each size is remembered, so each one is worked out
+    only once."""
+    if total_disks == 0:
+        return 0, 0
+    if total_disks == 1:
+        return 1, 0
+    if total_towers < 3:
+        return float("inf"), 0  # Two towers can't move more than one disk.
+    if total_towers == 3:
+        return 2 ** total_disks - 1, total_disks - 1
+    best = None
+    for split in range(1, total_disks):
+        move_count = 2 * frame_stewart(split, total_towers)[0] + frame_stewart(total_disks - split, total_towers - 1)[0]
+        if best is None or move_count < best[0]:
+            best = (move_count, split)
+    return best
+
+
+def frame_stewart_moves(total_disks, towers="ABCD"):
+    """Yields the (from_tower, to_tower) moves that take `total_disks` disks
+    from towers[0] to towers[1] with the Frame-Stewart algorithm, using all
+    the other towers as spares."""
+    if total_disks == 0:
+        return
+    from_tower, to_tower, spares = towers[0], towers[1], towers[2:]
+    if len(towers) == 3:
+        yield from solution_moves(total_disks, from_tower, to_tower, spares[0])
+        return
+    split = frame_stewart(total_disks, len(towers))[1]
+    if split == 0:  # Just one disk.
+        yield from_tower, to_tower
+        return
+    helper = spares[0]
+    # Park the smallest disks on a helper tower, using every tower:
+    yield from frame_stewart_moves(split, from_tower + helper + to_tower + spares[1:])
+    # Move the larger disks without touching the helper tower:
+    yield from frame_stewart_moves(total_disks - split, from_tower + to_tower + spares[1:])
+    # Bring the smallest disks back on top:
+    yield from frame_stewart_moves(split, helper + to_tower + from_tower + spares[1:])
+
+
+def _time_solvers():
+    """Prints how long the solvers take for large numbers of disks."""
+    rng = random.Random(0)
+    print("Fewest moves from a random position, 3 towers:")
+    for total_disks in (10, 15, 20, 25, 30):
+        towers = {"A": [], "B": [], "C": []}
+        for disk in range(total_disks, 0, -1):
+            towers[rng.choice("ABC")].append(disk)
+        start_time = time.perf_counter()
+        to_tower, move_count = best_continuation(towers)
+        first_move = next(shortest_solution(towers, to_tower), None)
+        line = (f"{total_disks:3} disks: {move_count:>13,} moves to tower {to_tower}, first move {first_move}, "
+                f"found in {(time.perf_counter() - start_time) * 1000:.3f} ms")
+        if total_disks <= 20:  # Generating every move of the larger solutions takes minutes.
+            start_time = time.perf_counter()
+            streamed = sum(1 for move in shortest_solution(towers, to_tower))
+            assert streamed == move_count
+            line += f", all moves streamed in {time.perf_counter() - start_time:.2f} s"
+        print(line)
+    print("Frame-Stewart, 4 towers:")
+    for total_disks in (5, 10, 15, 20):
+        start_time = time.perf_counter()
+        frame_stewart.cache_clear()
+        moves = list(frame_stewart_moves(total_disks))
+        print(f"{total_disks:3} disks: {len(moves):>5} moves in {(time.perf_counter() - start_time) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    _time_solvers()
@@ -0,0 +1,129 @@
+"""A compact Tower of Hanoi state where every operation takes O(1) time.
+HanoiState keeps a bytearray that says which tower each disk is on, and
+one bitmask per tower with bit d - 1 set when disk d is on it. Since the
+smallest disk on a tower is on top, the top disk is the lowest set bit of
+the tower's mask, so checking a move, making it and checking whether the
+puzzle is solved never have to look at whole lists of disks."""
+import time
+
+import hanoi_solver
+
+TOWER_NAMES = "ABC"
+TOWER_INDEXES = {name: index for index, name in enumerate(TOWER_NAMES)}
+
+
+class HanoiState:
+    """A Tower of Hanoi position. States with the same disks on the same
+    towers are equal and hash the same, so they can be put in sets or used
+    as dictionary keys, as long as no moves are made on them while they
+    are there."""
+
+    def __init__(self, total_disks, start_tower="A"):
+        start_index = TOWER_INDEXES[start_tower]
+        self.total_disks = total_disks
+        self.full_mask = (1 << total_disks) - 1
+        self.disk_towers = bytearray([start_index]) * total_disks  # disk_towers[d - 1] is disk d's tower.
+        self.masks = [0, 0, 0]
+        self.masks[start_index] = self.full_mask
+        self.start_index = start_index
+
+    @classmethod
+    def from_towers(cls, towers):
+        """Returns a HanoiState for a towers dictionary like the one in
+        towerofhanoi.py. Raises ValueError if it isn't a legal position."""
+        disks = sorted(disk for tower in towers.values() for disk in tower)
+        if disks != list(range(1, len(disks) + 1)):
+            raise ValueError("The towers must hold the disks 1 to n once each.")
+        state = cls(len(disks))
+        state.masks = [0, 0, 0]
+        for name, tower in towers.items():
+            if tower != sorted(tower, reverse=True):
+                raise ValueError(f"Tower {name} has a larger disk on top of a smaller one.")
+            for disk in tower:
+                state.disk_towers[disk - 1] = TOWER_INDEXES[name]
+                state.masks[TOWER_INDEXES[name]] |= 1 << (disk - 1)
+        return state
+
+    def to_towers(self):
+        """Returns the towers dictionary for this state."""
+        towers = {name: [] for name in TOWER_NAMES}
+        for disk in range(self.total_disks, 0, -1):  # Largest disks go on the bottom.
+            towers[TOWER_NAMES[self.disk_towers[disk - 1]]].append(disk)
+        return towers
+
+    def copy(self):
+        new_state = self.__class__.__new__(self.__class__)
+        new_state.total_disks = self.total_disks
+        new_state.full_mask = self.full_mask
+        new_state.disk_towers = bytearray(self.disk_towers)
+        new_state.masks = list(self.masks)
+        new_state.start_index = self.start_index
+        return new_state
+
+    def top_disk(self, tower):
+        """Returns the disk on top of a tower ("A", "B" or "C"), or 0 if the
+        tower is empty."""
+        mask = self.masks[TOWER_INDEXES[tower]]
+        return (mask & -mask).bit_length()
+
+    def is_valid_move(self, from_tower, to_tower):
+        """Returns True if the top disk of from_tower can go on to_tower."""
+        from_mask = self.masks[TOWER_INDEXES[from_tower]]
+        to_mask = self.masks[TOWER_INDEXES[to_tower]]
+        if from_mask == 0 or from_tower == to_tower:
+            return False  # There is no disk to move.
+        # The moving disk must be smaller than the top disk on to_tower, which
+        # is the case when its bit is lower than every bit in to_tower's mask:
+        return to_mask == 0 or (from_mask & -from_mask) < (to_mask & -to_mask)
+
+    def move(self, from_tower, to_tower):
+        """Moves the top disk of from_tower onto to_tower. Raises ValueError
+        if that isn't a legal move."""
+        if not self.is_valid_move(from_tower, to_tower):
+            raise ValueError(f"Can't move a disk from tower {from_tower} to tower {to_tower}.")
+        from_index, to_index = TOWER_INDEXES[from_tower], TOWER_INDEXES[to_tower]
+        disk_bit = self.masks[from_index] & -self.masks[from_index]
+        self.masks[from_index] ^= disk_bit
+        self.masks[to_index] |= disk_bit
+        self.disk_towers[disk_bit.bit_length() - 1] = to_index
+
+    def is_solved(self):
+        """Returns True if all the disks are on a tower other than the one
+        they started on, just like the check in towerofhanoi.main()."""
+        for index, mask in enumerate(self.masks):
+            if mask == self.full_mask and index != self.start_index:
+                return True
+        return False
+
+    def __eq__(self, other):
+        if not isinstance(other, HanoiState):
+            return NotImplemented
+        return self.masks == other.masks
+
+    def __hash__(self):
+        return hash(tuple(self.masks))
+
+    def __repr__(self):
+        return f"HanoiState.from_towers({self.to_towers()!r})"
+
+
+def simulate_solution(total_disks):
+    """Plays the optimal solution on a HanoiState, checking every move, and
+    returns (moves made, seconds taken)."""
+    state = HanoiState(total_disks)
+    start_time = time.perf_counter()
+    move_count = 0
+    for from_tower, to_tower in hanoi_solver.solution_moves(total_disks):
+        state.move(from_tower, to_tower)
+        move_count += 1
+    seconds = time.perf_counter() - start_time
+    assert state.is_solved()
+    return move_count, seconds
+
+
+if __name__ == "__main__":
+    # The time per move should stay flat as the number of disks grows:
+    for total_disks in (10, 14, 18, 20):
+        move_count, seconds = simulate_solution(total_disks)
+        print(f"{total_disks} disks: {move_count:,} moves in {seconds:.2f} seconds, "
+              f"{seconds / move_count * 1e9:.0f} ns/move")
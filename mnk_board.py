@@ -0,0 +1,181 @@
+"""A board engine for m,n,k-games: k-in-a-row on a width x height board,
+optionally with gravity (tiles drop to the lowest empty space of a
+column, as in Four-in-a-Row). Tic-tac-toe is the 3,3,3-game, and
+Four-in-a-Row is the 7,6,4-game with gravity.
+
+Each player's marks are kept as one integer with a bit per space. The
+bits go row by row from the top left, with one always-empty padding bit
+at the end of each row so that lines can't wrap around from one row to
+the next. The winning lines for a board size are worked out once, by
+get_geometry(), and shared by every board of that size."""
+import functools
+
+# The four line directions as (column step, row step):
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (-1, 1))  # Across, down and both diagonals.
+
+
+class Geometry:
+    """The precomputed winning lines for one board size."""
+
+    def __init__(self, width, height, k):
+        if min(width, height, k) < 1:
+            raise ValueError('width, height and k must be at least 1')
+        self.width, self.height, self.k = width, height, k
+        self.stride = width + 1  # Bits per row, counting the padding bit.
+        self.full_mask = sum(self.bit(column, row) for row in range(height) for column in range(width))
+        self.line_cells = []  # The (column, row) spaces of each line.
+        self.lines = []  # The same lines as bit masks.
+        self.cell_lines = {}  # For each bit index, the masks of the lines through it.
+        for row in range(height):
+            for column in range(width):
+                for column_step, row_step in DIRECTIONS:
+                    end_column = column + column_step * (k - 1)
+                    end_row = row + row_step * (k - 1)
+                    if not (0 <= end_column < width and end_row < height):
+                        continue  # This line would run off the board.
+                    cells = tuple((column + column_step * i, row + row_step * i) for i in range(k))
+                    self.line_cells.append(cells)
+                    self.lines.append(sum(self.bit(*cell) for cell in cells))
+        for line in self.lines:
+            for bit_index in range(line.bit_length()):
+                if line >> bit_index & 1:
+                    self.cell_lines.setdefault(bit_index, []).append(line)
+        # Shifting the bits by these amounts moves every mark one step along
+        # each direction:
+        self.shifts = tuple(column_step + row_step * self.stride for column_step, row_step in DIRECTIONS)
+
+    def bit_index(self, column, row):
+        """Returns the bit number of the space at (column, row)."""
+        return row * self.stride + column
+
+    def bit(self, column, row):
+        """Returns the mask with only the space at (column, row) set."""
+        return 1 << (row * self.stride + column)
+
+    def has_line(self, mask):
+        """Returns True if the marks in `mask` include k in a row anywhere.
+        This takes k shifts and ANDs per direction, however big the board."""
+        for shift in self.shifts:
+            run = mask  # Marks with at least 1 in a row going this way.
+            for i in range(1, self.k):
+                run &= mask >> (shift * i)
+                if not run:
+                    break
+            if run:
+                return True
+        return False
+
+    def completes_line(self, mask, column, row):
+        """Returns True if the marks in `mask` fill a line that goes through
+        (column, row). Only the few lines through that space are checked."""
+        for line in self.cell_lines.get(self.bit_index(column, row), ()):
+            if mask & line == line:
+                return True
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def get_geometry(width, height, k):
+    """Returns the Geometry for a board size, making it the first time."""
+    return Geometry(width, height, k)
+
+
+def lines_by_start(geometry, key_of=None):
+    """Returns the winning lines for a dictionary board as a list of
+    (first key, [the line's other keys, as a tuple, for each line]) pairs.
+    A win check only has to look past the first key of the lines that start
+    on one of the player's marks. `key_of(column, row)` gives the board's key
+    for a space; by default the keys are (column, row) tuples."""
+    if key_of is None:
+        key_of = lambda column, row: (column, row)
+    starts = {}
+    for cells in geometry.line_cells:
+        keys = [key_of(column, row) for column, row in cells]
+        starts.setdefault(keys[0], []).append(tuple(keys[1:]))
+    return list(starts.items())
+
+
+class MNKBoard:
+    """A board for an m,n,k-game. Spaces are (column, row) tuples with row 0
+    at the top. Any hashable value can be used as a player's mark."""
+
+    def __init__(self, width, height, k, gravity=False, empty=None):
+        self.geometry = get_geometry(width, height, k)
+        self.gravity = gravity
+        self.empty = empty  # The value returned for empty spaces.
+        self.cells = [empty] * (self.geometry.stride * height)  # Flat, indexed by bit number.
+        self.masks = {}  # Each player's mark -> the mask of their spaces.
+        self.heights = [0] * width  # Marks in each column, used with gravity.
+        self.move_count = 0
+        self.last_move = None
+
+    def copy(self):
+        """Returns a new MNKBoard with the same marks as this one."""
+        new_board = self.__class__.__new__(self.__class__)
+        new_board.geometry = self.geometry
+        new_board.gravity = self.gravity
+        new_board.empty = self.empty
+        new_board.cells = list(self.cells)
+        new_board.masks = dict(self.masks)
+        new_board.heights = list(self.heights)
+        new_board.move_count = self.move_count
+        new_board.last_move = self.last_move
+        return new_board
+
+    def __getitem__(self, space):
+        column, row = space
+        if not (0 <= column < self.geometry.width and 0 <= row < self.geometry.height):
+            raise KeyError(space)
+        return self.cells[self.geometry.bit_index(column, row)]
+
+    def landing_row(self, column):
+        """With gravity, returns the row a mark dropped into `column` lands
+        on, or None if the column is full."""
+        height = self.heights[column]
+        if height == self.geometry.height:
+            return None
+        return self.geometry.height - 1 - height
+
+    def is_valid_move(self, column, row):
+        """Returns True if a mark can be placed on (column, row)."""
+        if not (0 <= column < self.geometry.width and 0 <= row < self.geometry.height):
+            return False
+        if self.gravity:
+            return row == self.landing_row(column)
+        return self.cells[self.geometry.bit_index(column, row)] == self.empty
+
+    def place(self, column, row, mark):
+        """Puts `mark` on (column, row), which must be a valid move."""
+        if not self.is_valid_move(column, row):
+            raise ValueError(f'({column}, {row}) is not a valid move.')
+        bit_index = self.geometry.bit_index(column, row)
+        self.cells[bit_index] = mark
+        self.masks[mark] = self.masks.get(mark, 0) | 1 << bit_index
+        self.heights[column] += 1
+        self.move_count += 1
+        self.last_move = (column, row)
+
+    def drop(self, column, mark):
+        """With gravity, drops `mark` into `column` and returns its row."""
+        row = self.landing_row(column)
+        if row is None:
+            raise ValueError(f'Column {column} is full.')
+        self.place(column, row, mark)
+        return row
+
+    def is_winner(self, mark):
+        """Returns True if `mark` has k in a row anywhere on the board."""
+        return self.geometry.has_line(self.masks.get(mark, 0))
+
+    def last_move_wins(self):
+        """Returns True if the last mark placed completed a line. This only
+        checks the lines through the last move."""
+        if self.last_move is None:
+            return False
+        column, row = self.last_move
+        mark = self.cells[self.geometry.bit_index(column, row)]
+        return self.geometry.completes_line(self.masks[mark], column, row)
+
+    def is_full(self):
+        """Returns True if every space has a mark on it."""
+        return self.move_count == self.geometry.width * self.geometry.height
@@ -1,6 +1,14 @@
 # tictactoe.py, A non-OOP tic-tac-toe game.
+import mnk_board
+import tictactoe_solver
+
 ALL_SPACES = list('123456789')  # The keys for a TTT board dictionary.
 X, O, BLANK = 'X', 'O', ' '  # Constants for string values.
+COMPUTER = None  # Set to X or O to play against a perfect computer player.
+# Tic-tac-toe is 3 in a row on a 3 x 3 board. The engine in mnk_board
+# works out the winning lines, grouped by the space each one starts on:
+GEOMETRY = mnk_board.get_geometry(3, 3, 3)
+LINES_BY_START = mnk_board.lines_by_start(GEOMETRY, lambda column, row: ALL_SPACES[row * 3 + column])
 
 
 def main():
@@ -14,6 +22,9 @@ def main():
         # Display the board on the screen.
         # Keep asking the player until they enter a number 1-9:
         move = None
+        if current_player == COMPUTER:
+            move = get_computer_move(game_board)
+            print(f'{current_player} moves on {move}.')
         while not is_valid_space(game_board, move):
             print(f'What is {current_player}\'s move? (1-9)')
             move = input()
@@ -58,17 +69,13 @@ def is_valid_space(board, space):
 
 def is_winner(board, player):
     """Return True if player is a winner on this TTTBoard."""
-
-    b, p = board, player  # Shorter names as "syntactic sugar".
     # Check for 3 marks across the 3 rows, 3 columns, and 2 diagonals.
-    return ((b['1'] == b['2'] == b['3'] == p) or  # Across the top
-            (b['4'] == b['5'] == b['6'] == p) or  # Across the middle
-            (b['7'] == b['8'] == b['9'] == p) or  # Across the bottom
-            (b['1'] == b['4'] == b['7'] == p) or  # Down the left
-            (b['2'] == b['5'] == b['8'] == p) or  # Down the middle
-            (b['3'] == b['6'] == b['9'] == p) or  # Down the right
-            (b['3'] == b['5'] == b['7'] == p) or  # Diagonal
-            (b['1'] == b['5'] == b['9'] == p))  # Diagonal
+    for start, other_spaces in LINES_BY_START:
+        if board[start] == player:
+            for space2, space3 in other_spaces:
+                if board[space2] == board[space3] == player:
+                    return True
+    return False
 
 
 def is_board_full(board):
@@ -79,6 +86,11 @@ def is_board_full(board):
     return True  # No spaces are blank, so return True.
 
 
+def get_computer_move(board):
+    """Return a best space for whoever's turn it is, with perfect play."""
+    return tictactoe_solver.get_best_move(board)
+
+
 def update_board(board, space, mark):
     """Sets the space on the board to mark."""
     board[space] = mark
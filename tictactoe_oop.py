@@ -1,8 +1,22 @@
 # tictactoe_oop.py, an object-oriented tic-tac-toe game.
-import copy
+import functools
+
+import mnk_board
+import tictactoe_solver
 
 ALL_SPACES = list('123456789')  # The keys for a TTT board.
 X, O, BLANK = 'X', 'O', ' '  # Constants for string values.
+# Tic-tac-toe is 3 in a row on a 3 x 3 board. The engine in mnk_board
+# works out the winning lines, grouped by the space each one starts on:
+GEOMETRY = mnk_board.get_geometry(3, 3, 3)
+LINES_BY_START = mnk_board.lines_by_start(GEOMETRY, lambda column, row: ALL_SPACES[row * 3 + column])
+# The 8 lines (3 across, 3 down and 2 diagonals) as tuples of spaces:
+WINNING_LINES = [tuple(ALL_SPACES[row * 3 + column] for column, row in cells) for cells in GEOMETRY.line_cells]
+# The indexes of the WINNING_LINES that go through each space:
+SPACE_LINES = {space: [line_index for line_index, line in enumerate(WINNING_LINES) if space in line]
+               for space in ALL_SPACES}
+RENDER_CACHE_SIZE = 1024  # How many rendered board strings to remember.
+COMPUTER = None  # Set to X or O to play against a perfect computer player.
 
 
 def main():
@@ -20,6 +34,9 @@ def main():
         # Display the board on the screen.
         # Keep asking the player until they enter a number 1-9:
         move = None
+        if current_player == COMPUTER:
+            move = game_board.get_computer_move()
+            print(f'{current_player} moves on {move}.')
         while not game_board.is_valid_space(move):
             print(f'What is {current_player}\'s move? (1-9)')
             move = input()
@@ -37,6 +54,32 @@ def main():
     print('Thanks for playing!')
 
 
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_board(board_key):
+    """Return the text of a TTTBoard from its board key."""
+    s = dict(zip(ALL_SPACES, board_key))
+    return f'''
+    {s['1']}|{s['2']}|{s['3']}
+    -+-+-
+    {s['4']}|{s['5']}|{s['6']}
+    -+-+-
+    {s['7']}|{s['8']}|{s['9']}
+    1 2 3
+    4 5 6
+    7 8 9'''
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_mini_board(board_key):
+    """Return the text of a MiniBoard from its board key. Blank spaces are
+    shown as '.' without changing any board."""
+    s = {space: '.' if mark == BLANK else mark for space, mark in zip(ALL_SPACES, board_key)}
+    return f'''
+        {s['1']}{s['2']}{s['3']} 123
+        {s['4']}{s['5']}{s['6']} 456
+        {s['7']}{s['8']}{s['9']} 789'''
+
+
 class TTTBoard:
     def __init__(self, usePrettyBoard=False, useLogging=False):
 
@@ -45,17 +88,16 @@ class TTTBoard:
         for space in ALL_SPACES:
             self._spaces[space] = BLANK  # All spaces start as blank.
 
+    def get_board_key(self):
+        """Return an immutable snapshot of the marks on the board, which can
+        be used as a dictionary key."""
+        return tuple([self._spaces[space] for space in ALL_SPACES])
+
     def get_board_str(self):
         """Return a text-representation of the board."""
-        return f'''
-    {self._spaces['1']}|{self._spaces['2']}|{self._spaces['3']}
-    -+-+-
-    {self._spaces['4']}|{self._spaces['5']}|{self._spaces['6']}
-    -+-+-
-    {self._spaces['7']}|{self._spaces['8']}|{self._spaces['9']}
-    1 2 3
-    4 5 6
-    7 8 9'''
+        # Rendering never changes the board, so boards with the same marks
+        # can share the cached string, even from different threads.
+        return render_board(self.get_board_key())
 
     def is_valid_space(self, space):
         """Returns True if the space on the board is a valid space number
@@ -64,16 +106,14 @@ class TTTBoard:
 
     def is_winner(self, player):
         """Return True if player is a winner on this TTTBoard."""
-        s, p = self._spaces, player  # Shorter names as "syntactic sugar".
         # Check for 3 marks across the 3 rows, 3 columns, and 2 diagonals.
-        return ((s['1'] == s['2'] == s['3'] == p) or  # Across the top
-                (s['4'] == s['5'] == s['6'] == p) or  # Across the middle
-                (s['7'] == s['8'] == s['9'] == p) or  # Across the bottom
-                (s['1'] == s['4'] == s['7'] == p) or  # Down the left
-                (s['2'] == s['5'] == s['8'] == p) or  # Down the middle
-                (s['3'] == s['6'] == s['9'] == p) or  # Down the right
-                (s['3'] == s['5'] == s['7'] == p) or  # Diagonal
-                (s['1'] == s['5'] == s['9'] == p))  # Diagonal
+        spaces = self._spaces
+        for start, other_spaces in LINES_BY_START:
+            if spaces[start] == player:
+                for space2, space3 in other_spaces:
+                    if spaces[space2] == spaces[space3] == player:
+                        return True
+        return False
 
     def is_board_full(self):
         """Return True if every space on the board has been taken."""
@@ -86,6 +126,10 @@ class TTTBoard:
         """Sets the space on the board to player."""
         self._spaces[space] = player
 
+    def get_computer_move(self):
+        """Return a best space for whoever's turn it is, with perfect play."""
+        return tictactoe_solver.get_best_move(self._spaces)
+
 
 class MiniBoard(TTTBoard):
     """Child classes inherit all the methods of their parent classes. But a child
@@ -95,19 +139,7 @@ class MiniBoard(TTTBoard):
 
     def get_board_str(self):
         """Return a tiny text-representation of the board."""
-        # Change blank spaces to a '.'
-        for space in ALL_SPACES:
-            if self._spaces[space] == BLANK:
-                self._spaces[space] = '.'
-        board_str = f'''
-        {self._spaces['1']}{self._spaces['2']}{self._spaces['3']} 123
-        {self._spaces['4']}{self._spaces['5']}{self._spaces['6']} 456
-        {self._spaces['7']}{self._spaces['8']}{self._spaces['9']} 789'''
-        # Change '.' back to blank spaces.
-        for space in ALL_SPACES:
-            if self._spaces[space] == '.':
-                self._spaces[space] = BLANK
-        return board_str
+        return render_mini_board(self.get_board_key())
 
 
 class HintBoard(TTTBoard):
@@ -119,30 +151,42 @@ class HintBoard(TTTBoard):
     To prevent this duplicate code, the built-in super() function allows an overriding method to call the original
     method in the parent class."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # For each player, how many of their marks are on each of the 8 lines:
+        self._line_counts = {X: [0] * len(WINNING_LINES), O: [0] * len(WINNING_LINES)}
+
+    def update_board(self, space, player):
+        """Sets the space on the board to player and updates the line counts."""
+        old_mark = self._spaces[space]
+        super().update_board(space, player)
+        for line_index in SPACE_LINES[space]:
+            if old_mark in self._line_counts:
+                self._line_counts[old_mark][line_index] -= 1
+            if player in self._line_counts:
+                self._line_counts[player][line_index] += 1
+
+    def winning_moves(self, player):
+        """Return the blank spaces where player would complete a line."""
+        other = O if player == X else X
+        moves = set()
+        for line_index, line in enumerate(WINNING_LINES):
+            # Two of player's marks and none of the other's leaves one blank:
+            if self._line_counts[player][line_index] == 2 and self._line_counts[other][line_index] == 0:
+                moves.update(space for space in line if self._spaces[space] == BLANK)
+        return sorted(moves)
+
+    def can_win(self, player):
+        """Return True if player has won or can win in one more move."""
+        return 3 in self._line_counts[player] or bool(self.winning_moves(player))
+
     def get_board_str(self):
         """Return a text-representation of the board with hints."""
         board_str = super().get_board_str()  # Call getBoardStr() in TTTBoard.
-        x_can_win = False
-        o_can_win = False
-        original_spaces = self._spaces  # Backup _spaces.
-        for space in ALL_SPACES:  # Check each space:
-            # Simulate X moving on this space:
-            self._spaces = copy.copy(original_spaces)
-            if self._spaces[space] == BLANK:
-                self._spaces[space] = X
-            if self.is_winner(X):
-                x_can_win = True
-            # Simulate O moving on this space:
-            self._spaces = copy.copy(original_spaces)
-            if self._spaces[space] == BLANK:
-                self._spaces[space] = O
-            if self.is_winner(O):
-                o_can_win = True
-        if x_can_win:
+        if self.can_win(X):
             board_str += '\nX can win in one more move.'
-        if o_can_win:
+        if self.can_win(O):
             board_str += '\nO can win in one more move.'
-        self._spaces = original_spaces
         return board_str
 
 
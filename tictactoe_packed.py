@@ -0,0 +1,184 @@
+# tictactoe_packed.py, a compact tic-tac-toe board for storing many positions.
+"""PackedBoard is an int: bits 0 to 8 are X's marks on spaces '1' to '9',
+and bits 9 to 17 are O's marks. It has the same methods as a TTTBoard from
+tictactoe_oop.py, except that update_board() returns a new board instead
+of changing this one. Being an int with empty __slots__, a board has no
+__dict__, is hashable, and takes a few dozen bytes instead of hundreds.
+PackedBoardArray stores boards in an array at 4 bytes apiece."""
+import array
+import random
+import sys
+import tracemalloc
+
+import tictactoe_oop
+from tictactoe_oop import ALL_SPACES, BLANK, O, X
+
+SPACE_INDEX = {space: index for index, space in enumerate(ALL_SPACES)}
+FULL_MASK = 0b111111111  # All 9 spaces.
+PLAYER_SHIFT = {X: 0, O: 9}  # Where each player's 9 bits start.
+LINE_MASKS = [sum(1 << SPACE_INDEX[space] for space in line) for line in tictactoe_oop.WINNING_LINES]
+# HAS_LINE[mask] is True if the 9-bit mask covers a winning line:
+HAS_LINE = tuple(any(mask & line == line for line in LINE_MASKS) for mask in range(FULL_MASK + 1))
+
+
+class PackedBoard(int):
+    __slots__ = ()  # No per-board __dict__.
+
+    @classmethod
+    def from_spaces(cls, spaces):
+        """Return a PackedBoard with the marks of a dictionary of spaces."""
+        value = 0
+        for space, mark in spaces.items():
+            if mark in PLAYER_SHIFT:
+                value |= 1 << (SPACE_INDEX[space] + PLAYER_SHIFT[mark])
+        return cls(value)
+
+    def mask(self, player):
+        """Return the 9-bit mask of player's marks."""
+        return (self >> PLAYER_SHIFT[player]) & FULL_MASK
+
+    def get_spaces(self):
+        """Return the board as a dictionary of spaces, like TTTBoard._spaces."""
+        return dict(zip(ALL_SPACES, self.get_board_key()))
+
+    def get_board_key(self):
+        """Return a tuple of the marks, the same as TTTBoard.get_board_key()."""
+        return tuple([X if self >> index & 1 else O if self >> (index + 9) & 1 else BLANK
+                      for index in range(9)])
+
+    def get_board_str(self):
+        """Return a text-representation of the board."""
+        return tictactoe_oop.render_board(self.get_board_key())
+
+    def is_valid_space(self, space):
+        """Returns True if the space on the board is a valid space number
+        and the space is blank."""
+        return space in SPACE_INDEX and not (self | self >> 9) >> SPACE_INDEX[space] & 1
+
+    def is_winner(self, player):
+        """Return True if player is a winner on this board."""
+        return HAS_LINE[self.mask(player)]
+
+    def is_board_full(self):
+        """Return True if every space on the board has been taken."""
+        return (self | self >> 9) & FULL_MASK == FULL_MASK
+
+    def update_board(self, space, player):
+        """Return a new board with the space set to player."""
+        index = SPACE_INDEX[space]
+        cleared = self & ~((1 << index) | (1 << (index + 9)))  # Remove any old mark.
+        return PackedBoard(cleared | 1 << (index + PLAYER_SHIFT[player]))
+
+    def __repr__(self):
+        return f'PackedBoard({"".join(self.get_board_key())!r})'
+
+
+class PackedBoardArray:
+    """A list-like container of PackedBoards stored as 4-byte integers.
+    Boards are only turned back into PackedBoard objects when read."""
+
+    def __init__(self, boards=()):
+        self._values = array.array('I', boards)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            new_array = PackedBoardArray()
+            new_array._values = self._values[index]
+            return new_array
+        return PackedBoard(self._values[index])
+
+    def __setitem__(self, index, board):
+        self._values[index] = board
+
+    def __iter__(self):
+        for value in self._values:
+            yield PackedBoard(value)
+
+    def append(self, board):
+        self._values.append(board)
+
+    def extend(self, boards):
+        self._values.extend(boards)
+
+    def count_winners(self, player):
+        """Return how many of the boards player has won."""
+        shift = PLAYER_SHIFT[player]
+        return sum([HAS_LINE[(value >> shift) & FULL_MASK] for value in self._values])
+
+    def tobytes(self):
+        return self._values.tobytes()
+
+    @classmethod
+    def frombytes(cls, data):
+        new_array = cls()
+        new_array._values.frombytes(data)
+        return new_array
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the stored boards."""
+        return len(self._values) * self._values.itemsize
+
+
+def _random_moves(rng):
+    """Return a list of (space, player) moves for a random game."""
+    spaces = list(ALL_SPACES)
+    rng.shuffle(spaces)
+    return [(space, X if index % 2 == 0 else O) for index, space in enumerate(spaces[:rng.randint(0, 9)])]
+
+
+def measure_bytes_per_board(count=100_000, seed=0):
+    """Return {kind of storage: bytes per board} for `count` random boards,
+    measured with tracemalloc."""
+    rng = random.Random(seed)
+    games = [_random_moves(rng) for i in range(count)]
+    results = {}
+
+    def measure(name, build):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        boards = build()
+        results[name] = (tracemalloc.get_traced_memory()[0] - before) / count
+        tracemalloc.stop()
+        del boards
+
+    def build_tttboards():
+        boards = []
+        for moves in games:
+            board = tictactoe_oop.TTTBoard()
+            for space, player in moves:
+                board.update_board(space, player)
+            boards.append(board)
+        return boards
+
+    def build_packed_boards():
+        boards = []
+        for moves in games:
+            board = PackedBoard()
+            for space, player in moves:
+                board = board.update_board(space, player)
+            boards.append(board)
+        return boards
+
+    def build_packed_array():
+        boards = PackedBoardArray()
+        for moves in games:
+            board = PackedBoard()
+            for space, player in moves:
+                board = board.update_board(space, player)
+            boards.append(board)
+        return boards
+
+    measure('TTTBoard in a list', build_tttboards)
+    measure('PackedBoard in a list', build_packed_boards)
+    measure('PackedBoardArray', build_packed_array)
+    return results
+
+
+if __name__ == '__main__':
+    print(f'Python {sys.version.split()[0]}, bytes per board (including the list\'s pointer):')
+    for name, size in measure_bytes_per_board().items():
+        print(f'{name:>22}: {size:7.1f}')
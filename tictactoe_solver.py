@@ -0,0 +1,123 @@
+# tictactoe_solver.py, a perfect-play solver for tic-tac-toe.
+"""Works out every tic-tac-toe position once, when this module is imported.
+A board and its rotations and reflections play the same way, so each
+position is folded to a canonical key (the smallest of its 8 symmetric
+versions) and only those 765 positions are solved and stored. After that,
+finding the best moves is a dictionary lookup.
+
+Boards are dictionaries with the keys '1' to '9', the same as in
+tictactoe.py and the _spaces of a TTTBoard in tictactoe_oop.py."""
+import time
+
+import mnk_board
+
+ALL_SPACES = list('123456789')  # The keys for a TTT board dictionary.
+X, O, BLANK = 'X', 'O', ' '  # Constants for string values.
+WIN, TIE, LOSS = 1, 0, -1  # Game values for the player whose turn it is.
+# The indexes of the 8 winning lines, from the shared mnk_board engine:
+LINES = tuple(tuple(row * 3 + column for column, row in cells)
+              for cells in mnk_board.get_geometry(3, 3, 3).line_cells)
+
+
+def _make_symmetries():
+    """Returns the 8 rotations and reflections of the board, each as a tuple
+    where symmetry[i] is the index that ends up at index i."""
+    rotate = tuple(3 * (2 - column) + row for row in range(3) for column in range(3))
+    flip = tuple(3 * row + (2 - column) for row in range(3) for column in range(3))
+    symmetries = []
+    symmetry = tuple(range(9))
+    for turn in range(4):
+        symmetries.append(symmetry)
+        symmetries.append(tuple(symmetry[i] for i in flip))
+        symmetry = tuple(symmetry[i] for i in rotate)
+    return symmetries
+
+
+SYMMETRIES = _make_symmetries()
+
+
+def canonical(cells):
+    """Returns (key, symmetry) for a 9-character string of marks, where key
+    is the smallest symmetric version of it and key[i] == cells[symmetry[i]]."""
+    return min((''.join([cells[i] for i in symmetry]), symmetry) for symmetry in SYMMETRIES)
+
+
+def _has_line(cells, player):
+    """Returns True if `player` has 3 in a row in a 9-character string of
+    marks."""
+    return any(cells[a] == cells[b] == cells[c] == player for a, b, c in LINES)
+
+
+def _player_to_move(cells):
+    """X always goes first, so it's X's turn when both have made as many moves."""
+    return X if cells.count(X) == cells.count(O) else O
+
+
+def _solve(key, table):
+    """Solves the canonical position `key` and every position after it,
+    storing (value, best move indexes) in `table`. Returns the value."""
+    if key in table:
+        return table[key][0]
+    player = _player_to_move(key)
+    other = O if player == X else X
+    if _has_line(key, other):
+        result = (LOSS, ())  # The other player has already won.
+    elif BLANK not in key:
+        result = (TIE, ())
+    else:
+        move_values = {}
+        for index, mark in enumerate(key):
+            if mark == BLANK:
+                next_key = canonical(key[:index] + player + key[index + 1:])[0]
+                move_values[index] = -_solve(next_key, table)  # Their win is our loss.
+        value = max(move_values.values())
+        result = (value, tuple(index for index, move_value in move_values.items() if move_value == value))
+    table[key] = result
+    return result[0]
+
+
+def build_table():
+    """Returns {canonical key: (value, best move indexes)} for every position
+    that can come up in a game."""
+    table = {}
+    _solve(BLANK * 9, table)
+    return table
+
+
+_start_time = time.perf_counter()
+TABLE = build_table()
+BUILD_SECONDS = time.perf_counter() - _start_time
+_answers = {}  # solve() results for boards as they are, before folding.
+
+
+def solve(board):
+    """Returns (value, best_spaces) for the player whose turn it is on
+    `board`. The value is WIN, TIE or LOSS with perfect play from both
+    sides, and best_spaces is a list of the space keys ('1' to '9') that
+    keep that value. The list is empty if the game is already over. Raises
+    ValueError for a board that can't come up in a game."""
+    cells = ''.join([board[space] for space in ALL_SPACES])
+    if cells not in _answers:  # Only 5478 different boards can ever come up.
+        key, symmetry = canonical(cells)
+        if key not in TABLE:
+            raise ValueError(f'{cells!r} is not a board that can come up in a game.')
+        value, best_indexes = TABLE[key]
+        # Index i of the canonical key came from index symmetry[i] of the board:
+        _answers[cells] = (value, sorted(ALL_SPACES[symmetry[index]] for index in best_indexes))
+    value, best_spaces = _answers[cells]
+    return value, list(best_spaces)
+
+
+def get_best_move(board):
+    """Returns one of the best spaces for the player whose turn it is, or
+    None if the game is already over."""
+    best_spaces = solve(board)[1]
+    return best_spaces[0] if best_spaces else None
+
+
+if __name__ == '__main__':
+    print(f'Solved {len(TABLE)} positions in {BUILD_SECONDS * 1000:.1f} ms.')
+    start_time = time.perf_counter()
+    for i in range(100_000):
+        solve({space: BLANK for space in ALL_SPACES})
+    print(f'{(time.perf_counter() - start_time) * 10:.2f} microseconds per lookup.')
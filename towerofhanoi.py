@@ -3,6 +3,9 @@ A stack-moving puzzle game."""
 import copy
 import sys
 
+import hanoi_render
+import hanoi_solver
+
 TOTAL_DISKS = 5  # More disks means a more difficult puzzle.
 # Start with all disks on tower A:
 SOLVED_TOWER = list(range(TOTAL_DISKS, 0, -1))
@@ -43,13 +46,16 @@ More info at https://en.wikipedia.org/wiki/Tower_of_Hanoi
 def get_player_move(towers):
     """Asks the player for a move. Returns (from_tower, to_tower)."""
     while True:  # Keep asking player until they enter a valid move.
-        print('Enter the letters of "from" and "to" towers, or QUIT.')
+        print('Enter the letters of "from" and "to" towers, HINT, or QUIT.')
         print("(e.g., AB to moves a disk from tower A to tower B.)")
         print()
         response = input("> ").upper().strip()
         if response == "QUIT":
             print("Thanks for playing!")
             sys.exit()
+        if response == "HINT":
+            display_hint(towers)
+            continue  # Ask player again for their move.
         # Make sure the user entered valid tower letters:
         if response not in ("AB", "AC", "BA", "BC", "CA", "CB"):
             print("Enter one of AB, AC, BA, BC, CA, or CB.")
@@ -71,32 +77,19 @@ def get_player_move(towers):
             return from_tower, to_tower
 
 
-def display_towers(towers):
-    """Display the three towers with their disks."""
-    # Display the three towers:
-    for level in range(TOTAL_DISKS, -1, -1):
-        for tower in (towers["A"], towers["B"], towers["C"]):
-            if level >= len(tower):
-                display_disk(0)  # Display the bare pole with no disk.
-            else:
-                display_disk(tower[level])  # Display the disk.
-        print()
-    # Display the tower labels A, B, and C:
-    empty_space = " " * TOTAL_DISKS
-    print("{0} A{0}{0} B{0}{0} C\n".format(empty_space))
+def display_hint(towers):
+    """Display the best next move and how many moves are left to solve the
+    puzzle from here."""
+    to_tower, move_count = hanoi_solver.best_continuation(towers)
+    from_tower, next_tower = next(hanoi_solver.shortest_solution(towers, to_tower))
+    print(f"Try {from_tower}{next_tower}. You can finish on tower {to_tower} in {move_count} moves.")
+    print()
 
 
-def display_disk(width):
-    """Display a disk of the given width. A width of 0 means no disk."""
-    empty_space = " " * (TOTAL_DISKS - width)
-    if width == 0:
-        # Display a pole segment without a disk:
-        print(f"{empty_space}||{empty_space}", end="")
-    else:
-        # Display the disk:
-        disk = "@" * width
-        num_label = str(width).rjust(2, "_")
-        print(f"{empty_space}{disk}{num_label}{disk}{empty_space}", end="")
+def display_towers(towers):
+    """Display the three towers with their disks."""
+    # The whole picture is put together first and printed all at once:
+    print(hanoi_render.get_towers_str(towers, TOTAL_DISKS), end="")
 
 
 # If this program was run (instead of imported), run the game:
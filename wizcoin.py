@@ -1,4 +1,5 @@
 import collections.abc
+import functools
 import operator
 
 
@@ -7,21 +8,90 @@ class WizCoinException(Exception):
     pass
 
 
+KNUTS_PER_SICKLE = 29
+KNUTS_PER_GALLEON = 17 * 29
+
+# Ways to choose the coins for an amount, with what each coin costs under
+# them as (galleon, sickle, knut). Weights are in milligrams so that they
+# add up exactly.
+FEWEST_COINS = 'fewest_coins'
+LIGHTEST = 'lightest'
+COIN_COSTS = {FEWEST_COINS: (1, 1, 1), LIGHTEST: (31103, 11340, 5000)}
+
+
+@functools.lru_cache(maxsize=None)
+def change_table(strategy=FEWEST_COINS):
+    """Returns a tuple with the cheapest (sickles, knuts) for every amount
+    from 0 to KNUTS_PER_GALLEON - 1 knuts under a strategy, worked out once
+    by dynamic programming.
+
+    Any sickles and knuts worth a galleon or more include some worth exactly
+    one galleon, and under both strategies one galleon costs less than them.
+    So the cheapest payout of any amount is as many galleons as fit, and
+    then the entry in this table for what is left over."""
+    if strategy not in COIN_COSTS:
+        raise WizCoinException(f'strategy must be one of {", ".join(COIN_COSTS)}, not {strategy!r}')
+    galleon_cost, sickle_cost, knut_cost = COIN_COSTS[strategy]
+    costs = [0]  # costs[amount] is the cheapest cost of paying `amount` knuts.
+    table = [(0, 0)]
+    for amount in range(1, KNUTS_PER_GALLEON):
+        # Pay with one more knut, or one more sickle if that fits:
+        cost, (sickles, knuts) = costs[amount - 1] + knut_cost, table[amount - 1]
+        best = (cost, sickles, knuts + 1)
+        if amount >= KNUTS_PER_SICKLE:
+            cost, (sickles, knuts) = costs[amount - KNUTS_PER_SICKLE] + sickle_cost, table[amount - KNUTS_PER_SICKLE]
+            best = min(best, (cost, sickles + 1, knuts))
+        costs.append(best[0])
+        table.append(best[1:])
+    return tuple(table)
+
+
+def _check_coin_count(name, value):
+    """Raises WizCoinException unless `value` can be a number of coins.
+    Unlike galleons, sickles and knuts aren't checked for being negative."""
+    if not isinstance(value, int):
+        raise WizCoinException(f'{name} attr must be set to an int, not a ' + value.__class__.__qualname__)
+
+
 class WizCoin:
+    # Purses have no per-object __dict__. The total is worked out whenever a
+    # coin count is set, so reading it (and comparing purses) is just an
+    # attribute lookup.
+    __slots__ = ('_galleons', '_sickles', '_knuts', '_total')
+
     def __init__(self, galleons, sickles, knuts):
         """Create a new WizCoin object with galleons, sickles, and knuts."""
-        self.galleons = galleons
-        self.sickles = sickles
-        self.knuts = knuts
+        if (galleons.__class__ is not int or sickles.__class__ is not int or knuts.__class__ is not int
+                or galleons < 0):
+            # Raises the right WizCoinException, or accepts int subclasses:
+            self.galleons = galleons
+            _check_coin_count('sickles', sickles)
+            _check_coin_count('knuts', knuts)
+        self._galleons = galleons
+        self._sickles = sickles
+        self._knuts = knuts
+        self._total = (galleons * KNUTS_PER_GALLEON) + (sickles * KNUTS_PER_SICKLE) + knuts
         # NOTE: __init__() methods NEVER have a return statement.
 
+    @classmethod
+    def from_knuts(cls, amount, strategy=FEWEST_COINS):
+        """Returns a WizCoin worth `amount` knuts, paid with the fewest coins
+        (FEWEST_COINS) or with the lightest coins (LIGHTEST)."""
+        if not isinstance(amount, int):
+            raise WizCoinException('amount must be an int of knuts, not a ' + amount.__class__.__qualname__)
+        if amount < 0:
+            raise WizCoinException(f'a purse can\'t hold a negative amount, not {amount} knuts')
+        galleons, rest = divmod(amount, KNUTS_PER_GALLEON)
+        sickles, knuts = change_table(strategy)[rest]
+        return cls(galleons, sickles, knuts)
+
     def value(self):
         """The value (in knuts) of all the coins in this WizCoin object."""
-        return (self.galleons * 17 * 29) + (self.sickles * 29) + self.knuts
+        return self._total
 
     def weight_in_grams(self):
         """Returns the weight of the coins in grams."""
-        return (self.galleons * 31.103) + (self.sickles * 11.34) + (self.knuts * 5.0)
+        return (self._galleons * 31.103) + (self._sickles * 11.34) + (self._knuts * 5.0)
 
     # --snip--
 
@@ -38,48 +108,140 @@ class WizCoin:
         if value < 0:
             raise WizCoinException('galleons attr must be a positive int, not ' + value.__class__.__qualname__)
         self._galleons = value
+        if hasattr(self, '_sickles'):  # Not while __init__() is still setting the coins.
+            self._update_total()
+
+    @property
+    def sickles(self):
+        """Returns the number of sickle coins in this object."""
+        return self._sickles
+
+    @sickles.setter
+    def sickles(self, value):
+        _check_coin_count('sickles', value)
+        self._sickles = value
+        self._update_total()
+
+    @property
+    def knuts(self):
+        """Returns the number of knut coins in this object."""
+        return self._knuts
+
+    @knuts.setter
+    def knuts(self, value):
+        _check_coin_count('knuts', value)
+        self._knuts = value
+        self._update_total()
+
+    def _update_total(self):
+        self._total = (self._galleons * KNUTS_PER_GALLEON) + (self._sickles * KNUTS_PER_SICKLE) + self._knuts
 
     @property
     def total(self):
         """Total value (in knuts) of all the coins in this WizCoin object."""
         # Read-only property (when there is no setter or deleter method for e.g. 'total') so you can't do wc.total = 100
-        return (self.galleons * 17 * 29) + (self.sickles * 29) + self.knuts
+        return self._total
+
+    def __repr__(self):
+        return f'{self.__class__.__qualname__}({self._galleons!r}, {self._sickles!r}, {self._knuts!r})'
 
     # comparison dunder methods
     def _comparison_operator_helper(self, operator_func, other):  # higher-order function
         """A helper method for our comparison dunder methods."""
         if isinstance(other, WizCoin):
-            return operator_func(self.total, other.total)
+            return operator_func(self._total, other._total)
         elif isinstance(other, (int, float)):
-            return operator_func(self.total, other)
-        elif isinstance(other, collections.abc.Sequence):
-            other_value = (other[0] * 17 * 29) + (other[1] * 29) + other[2]
-            return operator_func(self.total, other_value)
-        elif operator_func == operator.eq:
-            return False
-        elif operator_func == operator.ne:
-            return True
+            return operator_func(self._total, other)
+        elif isinstance(other, (tuple, list)) or isinstance(other, collections.abc.Sequence):
+            other_value = (other[0] * KNUTS_PER_GALLEON) + (other[1] * KNUTS_PER_SICKLE) + other[2]
+            return operator_func(self._total, other_value)
         else:
+            # Lets the other object's reflected method answer (such as a
+            # WizCoinArray's). If it can't either, == falls back to `is`,
+            # so unrelated objects still compare as not equal:
             return NotImplemented
 
+    # Each comparison first handles the two common cases, another WizCoin or
+    # an int of knuts, by checking the exact class, before using the helper.
     def __eq__(self, other):  # eq is "EQual"
+        if other.__class__ is WizCoin:
+            return self._total == other._total
+        elif other.__class__ is int:
+            return self._total == other
         return self._comparison_operator_helper(operator.eq, other)
 
     def __ne__(self, other):  # ne is "Not Equal"
+        if other.__class__ is WizCoin:
+            return self._total != other._total
+        elif other.__class__ is int:
+            return self._total != other
         return self._comparison_operator_helper(operator.ne, other)
 
     def __lt__(self, other):  # lt is "Less Than"
+        if other.__class__ is WizCoin:
+            return self._total < other._total
+        elif other.__class__ is int:
+            return self._total < other
         return self._comparison_operator_helper(operator.lt, other)
 
     def __le__(self, other):  # le is "Less than or Equal"
+        if other.__class__ is WizCoin:
+            return self._total <= other._total
+        elif other.__class__ is int:
+            return self._total <= other
         return self._comparison_operator_helper(operator.le, other)
 
     def __gt__(self, other):  # gt is "Greater Than"
+        if other.__class__ is WizCoin:
+            return self._total > other._total
+        elif other.__class__ is int:
+            return self._total > other
         return self._comparison_operator_helper(operator.gt, other)
 
     def __ge__(self, other):  # ge is "Greater than or Equal"
+        if other.__class__ is WizCoin:
+            return self._total >= other._total
+        elif other.__class__ is int:
+            return self._total >= other
         return self._comparison_operator_helper(operator.ge, other)
 
+    def __hash__(self):
+        # Purses that are equal have the same total, and a purse equals the
+        # int of its total, so hashing the total keeps hash() consistent with
+        # ==. Don't change the coins of a purse while it's in a set or is a
+        # dictionary key.
+        return hash(self._total)
+
+    # arithmetic dunder methods: the results are new purses holding the
+    # fewest coins (as many galleons, then sickles, as possible).
+    def __add__(self, other):
+        if isinstance(other, WizCoin):
+            return WizCoin.from_knuts(self._total + other._total)
+        elif isinstance(other, int):  # A number of knuts.
+            return WizCoin.from_knuts(self._total + other)
+        return NotImplemented
+
+    __radd__ = __add__  # So that sum() works on purses.
+
+    def __sub__(self, other):
+        if isinstance(other, WizCoin):
+            return WizCoin.from_knuts(self._total - other._total)
+        elif isinstance(other, int):
+            return WizCoin.from_knuts(self._total - other)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, int):
+            return WizCoin.from_knuts(other - self._total)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            return WizCoin.from_knuts(self._total * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
 
 """
 Don’t confuse read-only properties with constant variables. Constant variables are written in all uppercase and 
@@ -0,0 +1,195 @@
+"""WizCoinArray holds many purses as three NumPy int64 columns: galleons,
+sickles and knuts. value(), total and weight_in_grams() work on every purse
+at once, comparisons return boolean arrays, and the coin counts are
+checked once for the whole batch instead of once per WizCoin. Reading a
+single purse back gives an ordinary WizCoin with Python ints in it."""
+import collections.abc
+import functools
+import operator
+import random
+import time
+
+import numpy as np
+
+import wizcoin
+from wizcoin import FEWEST_COINS, WizCoin, WizCoinException
+
+KNUTS_PER_SICKLE = 29
+KNUTS_PER_GALLEON = 17 * 29
+# The most coins of one kind a purse may hold, so that value() of any purse
+# fits in an int64:
+MAX_COINS = np.iinfo(np.int64).max // (KNUTS_PER_GALLEON + KNUTS_PER_SICKLE + 1)
+
+
+def _as_column(name, values, copy=True):
+    """Returns `values` as a one-dimensional int64 array, raising
+    WizCoinException if any of them can't be a number of coins. With
+    copy=False, an int64 array (or memory map) is used as it is."""
+    column = np.asarray(values)
+    if column.ndim != 1:
+        raise WizCoinException(f'{name} must be a one-dimensional sequence, not {column.ndim}-dimensional')
+    if column.dtype.kind not in 'iub':  # Not ints, bools or unsigned ints.
+        for index, value in enumerate(column.tolist()):
+            if not isinstance(value, int):
+                raise WizCoinException(f'{name}[{index}] must be an int, not a {value.__class__.__qualname__}')
+    if len(column) and (column.max() > MAX_COINS or column.min() < -MAX_COINS):
+        raise WizCoinException(f'{name} must be between {-MAX_COINS} and {MAX_COINS}')
+    return column.astype(np.int64, copy=copy)
+
+
+@functools.lru_cache(maxsize=None)
+def _change_columns(strategy):
+    """Returns wizcoin.change_table(strategy) as sickles and knuts arrays."""
+    table = np.array(wizcoin.change_table(strategy), dtype=np.int64)
+    return table[:, 0], table[:, 1]
+
+
+class WizCoinArray:
+    __array_ufunc__ = None  # Makes NumPy arrays leave comparisons with us to our own methods.
+
+    def __init__(self, galleons, sickles, knuts, copy=True):
+        """Create a new WizCoinArray from three equally long sequences. With
+        copy=False, int64 arrays are shared instead of copied."""
+        self.galleons = _as_column('galleons', galleons, copy)
+        self.sickles = _as_column('sickles', sickles, copy)
+        self.knuts = _as_column('knuts', knuts, copy)
+        if not len(self.galleons) == len(self.sickles) == len(self.knuts):
+            raise WizCoinException('galleons, sickles and knuts must have the same length')
+        # The same rule the galleons setter in WizCoin checks:
+        if len(self.galleons) and self.galleons.min() < 0:
+            index = int(np.argmax(self.galleons < 0))
+            raise WizCoinException(f'galleons[{index}] must be a positive int, not {self.galleons[index]}')
+
+    @classmethod
+    def from_knuts(cls, amounts, strategy=FEWEST_COINS):
+        """Returns a WizCoinArray paying each of `amounts` knuts with the
+        fewest or lightest coins, like WizCoin.from_knuts() does for one."""
+        amounts = _as_column('amounts', amounts)
+        if len(amounts) and amounts.min() < 0:
+            index = int(np.argmax(amounts < 0))
+            raise WizCoinException(f'amounts[{index}] can\'t be negative, not {amounts[index]}')
+        sickles_table, knuts_table = _change_columns(strategy)
+        galleons, rest = np.divmod(amounts, KNUTS_PER_GALLEON)
+        new_array = cls.__new__(cls)  # Every column is in range already.
+        new_array.galleons = galleons
+        new_array.sickles = sickles_table[rest]
+        new_array.knuts = knuts_table[rest]
+        return new_array
+
+    @classmethod
+    def from_coins(cls, coins):
+        """Returns a WizCoinArray of the purses in a list of WizCoins."""
+        coins = list(coins)
+        return cls([coin.galleons for coin in coins], [coin.sickles for coin in coins], [coin.knuts for coin in coins])
+
+    def to_coins(self):
+        """Returns the purses as a list of WizCoins."""
+        return [WizCoin(galleons, sickles, knuts) for galleons, sickles, knuts
+                in zip(self.galleons.tolist(), self.sickles.tolist(), self.knuts.tolist())]
+
+    def __len__(self):
+        return len(self.galleons)
+
+    def __getitem__(self, index):
+        """Returns a WizCoin for an int index, or a WizCoinArray for a slice,
+        boolean mask or array of indexes."""
+        if isinstance(index, (int, np.integer)):
+            return WizCoin(int(self.galleons[index]), int(self.sickles[index]), int(self.knuts[index]))
+        new_array = self.__class__.__new__(self.__class__)  # The columns are already checked.
+        new_array.galleons = self.galleons[index]
+        new_array.sickles = self.sickles[index]
+        new_array.knuts = self.knuts[index]
+        return new_array
+
+    def __iter__(self):
+        return iter(self.to_coins())
+
+    def __repr__(self):
+        return f'WizCoinArray({self.galleons.tolist()!r}, {self.sickles.tolist()!r}, {self.knuts.tolist()!r})'
+
+    def value(self):
+        """The value (in knuts) of each purse, as an int64 array."""
+        return self.galleons * KNUTS_PER_GALLEON + self.sickles * KNUTS_PER_SICKLE + self.knuts
+
+    def weight_in_grams(self):
+        """Returns the weight of the coins in each purse in grams."""
+        return (self.galleons * 31.103) + (self.sickles * 11.34) + (self.knuts * 5.0)
+
+    @property
+    def total(self):
+        """Total value (in knuts) of each purse, as an int64 array."""
+        return self.value()
+
+    def _comparison_operator_helper(self, operator_func, other):
+        """Compares every purse's total with `other`, which can be a number,
+        a WizCoin, a (galleons, sickles, knuts) sequence, another
+        WizCoinArray or an array of totals. Returns a boolean array."""
+        if isinstance(other, WizCoinArray):
+            return operator_func(self.total, other.total)
+        elif isinstance(other, WizCoin):
+            return operator_func(self.total, other.total)
+        elif isinstance(other, (int, float, np.number, np.ndarray)):
+            return operator_func(self.total, other)
+        elif isinstance(other, collections.abc.Sequence):
+            other_value = (other[0] * KNUTS_PER_GALLEON) + (other[1] * KNUTS_PER_SICKLE) + other[2]
+            return operator_func(self.total, other_value)
+        elif operator_func == operator.eq:
+            return np.zeros(len(self), dtype=bool)
+        elif operator_func == operator.ne:
+            return np.ones(len(self), dtype=bool)
+        else:
+            return NotImplemented
+
+    def __eq__(self, other):
+        return self._comparison_operator_helper(operator.eq, other)
+
+    def __ne__(self, other):
+        return self._comparison_operator_helper(operator.ne, other)
+
+    def __lt__(self, other):
+        return self._comparison_operator_helper(operator.lt, other)
+
+    def __le__(self, other):
+        return self._comparison_operator_helper(operator.le, other)
+
+    def __gt__(self, other):
+        return self._comparison_operator_helper(operator.gt, other)
+
+    def __ge__(self, other):
+        return self._comparison_operator_helper(operator.ge, other)
+
+    __hash__ = None  # Like NumPy arrays, these are mutable and not hashable.
+
+
+def _time_purses(count=1_000_000, seed=0):
+    """Prints how long the same work takes with WizCoins and a WizCoinArray."""
+    rng = random.Random(seed)
+    columns = [[rng.randrange(100) for i in range(count)], [rng.randrange(17) for i in range(count)],
+               [rng.randrange(29) for i in range(count)]]
+    timings = []
+
+    def timed(name, function):
+        start_time = time.perf_counter()
+        result = function()
+        timings.append((name, time.perf_counter() - start_time))
+        return result
+
+    coins = timed('build WizCoins', lambda: [WizCoin(*purse) for purse in zip(*columns)])
+    purses = timed('build WizCoinArray', lambda: WizCoinArray(*columns))
+    timed('WizCoin totals', lambda: [coin.total for coin in coins])
+    timed('WizCoinArray totals', lambda: purses.total)
+    timed('WizCoin weights', lambda: [coin.weight_in_grams() for coin in coins])
+    timed('WizCoinArray weights', purses.weight_in_grams)
+    threshold = WizCoin(50, 0, 0)
+    timed('WizCoin < WizCoin', lambda: [coin < threshold for coin in coins])
+    timed('WizCoinArray < WizCoin', lambda: purses < threshold)
+    amounts = purses.total.tolist()
+    timed('WizCoin.from_knuts', lambda: [WizCoin.from_knuts(amount, wizcoin.LIGHTEST) for amount in amounts])
+    timed('WizCoinArray.from_knuts', lambda: WizCoinArray.from_knuts(amounts, wizcoin.LIGHTEST))
+    print(f'{count:,} purses, NumPy {np.__version__}:')
+    for name, seconds in timings:
+        print(f'{name:>24}: {seconds * 1000:9.1f} ms, {seconds / count * 1e9:6.0f} ns per purse')
+
+
+if __name__ == '__main__':
+    _time_purses()
@@ -0,0 +1,312 @@
+"""A durable record of the purses of WizardCustomers (from
+composition_over_inheritance.py), kept as an append-only journal.
+
+Every deposit, withdrawal and transfer is one fixed-size 32-byte record:
+a sequence number, the kind of transaction, two customer ids, the amount
+in knuts and a CRC-32 of the rest. Records are written straight into a
+memory-mapped journal file. They are flushed to disk a group at a time
+(group commit), so a transaction costs a memory copy instead of a disk
+write. Only the records since the last commit can be lost in a crash.
+
+Balances are rebuilt by replaying the journal when it is opened. Snapshots
+save every balance with the sequence number they were taken at, so a
+restart only replays the records after the latest snapshot. Replay stops
+at the first record that is missing, out of sequence or fails its CRC,
+which is where the journal was cut off.
+
+This class isn't thread-safe; use one PurseJournal from one thread."""
+import mmap
+import os
+import random
+import struct
+import tempfile
+import time
+import zlib
+
+from wizcoin import WizCoin, WizCoinException
+
+JOURNAL_MAGIC = b'WZJN'
+SNAPSHOT_MAGIC = b'WZSN'
+VERSION = 1
+JOURNAL_HEADER = struct.Struct('<4sBBxxQ')  # Magic, version, record size, unused.
+RECORD_BODY = struct.Struct('<QBxxxIIq')  # Sequence number, kind, customer id, other customer id, knuts.
+RECORD_CRC = struct.Struct('<I')  # CRC-32 of the record body.
+RECORD_SIZE = RECORD_BODY.size + RECORD_CRC.size  # 32 bytes.
+SNAPSHOT_HEADER = struct.Struct('<4sBxxxQQ')  # Magic, version, last sequence number, number of balances.
+SNAPSHOT_ENTRY = struct.Struct('<Iq')  # Customer id, balance in knuts.
+DEPOSIT, WITHDRAW, TRANSFER = 1, 2, 3  # The kinds of record.
+GROUP_SIZE = 256  # Records written between commits.
+SNAPSHOT_INTERVAL = 100_000  # Records written between snapshots.
+GROWTH_RECORDS = 32768  # The journal file grows by this many records (1 MiB) at a time.
+MAX_CUSTOMER_ID = 2 ** 32 - 1  # Customer ids are stored as unsigned 32-bit ints.
+MAX_KNUTS = 2 ** 63 - 1  # Amounts and balances are stored as signed 64-bit ints.
+
+
+class JournalError(WizCoinException):
+    """Raised for journal or snapshot files that are damaged or aren't
+    journals."""
+    pass
+
+
+def amount_in_knuts(amount):
+    """Returns an amount given as a WizCoin or an int of knuts as knuts,
+    raising WizCoinException if it isn't more than zero."""
+    knuts = amount.total if isinstance(amount, WizCoin) else amount
+    if not isinstance(knuts, int) or knuts <= 0:
+        raise WizCoinException(f'amounts must be a WizCoin or int of knuts above zero, not {amount!r}')
+    return knuts
+
+
+class PurseJournal:
+    """The balances of customers, identified by int ids, backed by a
+    journal file at `path`. Snapshots go in `path` + ".snapshot"."""
+
+    def __init__(self, path, group_size=GROUP_SIZE, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.group_size = group_size
+        self.snapshot_interval = snapshot_interval
+        self.balances = {}  # Customer id -> knuts.
+        self.customers = {}  # Customer id -> registered WizardCustomer.
+        self.last_sequence = 0  # The sequence number of the latest record.
+        self.snapshot_sequence = 0  # The last sequence number in the latest snapshot.
+        self.committed_sequence = 0  # Records up to this one have been flushed to disk.
+        self.replayed = 0  # Records replayed when the journal was opened.
+        self._load_snapshot()
+        self._open_journal()
+        self._replay()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+        if len(data) < SNAPSHOT_HEADER.size:
+            raise JournalError(f'{self.snapshot_path} is too short to be a snapshot.')
+        magic, version, last_sequence, count = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != VERSION:
+            raise JournalError(f'{self.snapshot_path} is not a version {VERSION} snapshot.')
+        if len(data) != SNAPSHOT_HEADER.size + count * SNAPSHOT_ENTRY.size:
+            raise JournalError(f'{self.snapshot_path} should have {count} balances but is the wrong size.')
+        self.balances = dict(SNAPSHOT_ENTRY.iter_unpack(data[SNAPSHOT_HEADER.size:]))
+        self.last_sequence = self.snapshot_sequence = self.committed_sequence = last_sequence
+
+    def _open_journal(self):
+        if not os.path.exists(self.path):
+            with open(self.path, 'wb') as journal_file:
+                journal_file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, VERSION, RECORD_SIZE, 0))
+                journal_file.truncate(JOURNAL_HEADER.size + GROWTH_RECORDS * RECORD_SIZE)
+        self._file = open(self.path, 'r+b')
+        magic, version, record_size, unused = JOURNAL_HEADER.unpack(self._file.read(JOURNAL_HEADER.size))
+        if magic != JOURNAL_MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self._file.close()
+            raise JournalError(f'{self.path} is not a version {VERSION} journal.')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = (len(self._map) - JOURNAL_HEADER.size) // RECORD_SIZE
+
+    def _offset(self, sequence):
+        """Returns the file offset of the record with this sequence number."""
+        return JOURNAL_HEADER.size + (sequence - 1) * RECORD_SIZE
+
+    def _replay(self):
+        """Applies the records after the snapshot, then clears whatever is
+        after the last good record so it can't be mistaken for new ones."""
+        while self.last_sequence < self.capacity:
+            offset = self._offset(self.last_sequence + 1)
+            body = self._map[offset:offset + RECORD_BODY.size]
+            sequence, kind, customer_id, other_id, knuts = RECORD_BODY.unpack(body)
+            crc, = RECORD_CRC.unpack_from(self._map, offset + RECORD_BODY.size)
+            if sequence != self.last_sequence + 1 or crc != zlib.crc32(body):
+                break  # The journal ends here.
+            self._apply(kind, customer_id, other_id, knuts)
+            self.last_sequence = sequence
+            self.replayed += 1
+        if self.last_sequence < self.capacity and self._offset(self.last_sequence + 1) < len(self._map):
+            offset = self._offset(self.last_sequence + 1)
+            self._map[offset:] = bytes(len(self._map) - offset)
+            self._map.flush()
+        self.committed_sequence = self.last_sequence
+
+    def _grow(self, sequence):
+        """Makes the journal file long enough for record `sequence`, in
+        steps of GROWTH_RECORDS records."""
+        self.commit()
+        self._map.close()
+        self.capacity = (sequence // GROWTH_RECORDS + 1) * GROWTH_RECORDS
+        self._file.truncate(JOURNAL_HEADER.size + self.capacity * RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _append(self, kind, customer_id, other_id, knuts):
+        """Writes a record, applies it to the balances, and returns its
+        sequence number."""
+        sequence = self.last_sequence + 1
+        if sequence > self.capacity:
+            self._grow(sequence)
+        offset = self._offset(sequence)
+        body = RECORD_BODY.pack(sequence, kind, customer_id, other_id, knuts)
+        self._map[offset:offset + RECORD_BODY.size] = body
+        RECORD_CRC.pack_into(self._map, offset + RECORD_BODY.size, zlib.crc32(body))
+        self.last_sequence = sequence
+        self._apply(kind, customer_id, other_id, knuts)
+        if sequence - self.committed_sequence >= self.group_size:
+            self.commit()
+        if self.snapshot_interval and sequence - self.snapshot_sequence >= self.snapshot_interval:
+            self.snapshot()
+        return sequence
+
+    def _apply(self, kind, customer_id, other_id, knuts):
+        if kind == DEPOSIT:
+            self._set_balance(customer_id, self.balances.get(customer_id, 0) + knuts)
+        elif kind == WITHDRAW:
+            self._set_balance(customer_id, self.balances.get(customer_id, 0) - knuts)
+        elif kind == TRANSFER:
+            self._set_balance(customer_id, self.balances.get(customer_id, 0) - knuts)
+            self._set_balance(other_id, self.balances.get(other_id, 0) + knuts)
+        else:
+            raise JournalError(f'{self.path} has a record of unknown kind {kind}.')
+
+    def _set_balance(self, customer_id, knuts):
+        self.balances[customer_id] = knuts
+        if customer_id in self.customers:
+            self.customers[customer_id].purse = self.purse(customer_id)
+
+    def purse(self, customer_id):
+        """Returns a WizCoin holding a customer's balance."""
+        return WizCoin.from_knuts(self.balances.get(customer_id, 0))
+
+    def register(self, customer_id, customer):
+        """Keeps `customer.purse` (a WizardCustomer's) up to date with the
+        balance of `customer_id`, starting with the recovered balance."""
+        self.customers[customer_id] = customer
+        customer.purse = self.purse(customer_id)
+
+    def _check_customer(self, customer_id):
+        if not isinstance(customer_id, int) or not 0 <= customer_id <= MAX_CUSTOMER_ID:
+            raise WizCoinException(f'customer ids must be ints from 0 to {MAX_CUSTOMER_ID}, not {customer_id!r}')
+
+    def _check_room(self, customer_id, knuts):
+        """Raises WizCoinException if adding `knuts` would take a balance
+        past what a record or snapshot can hold."""
+        if knuts > MAX_KNUTS - self.balances.get(customer_id, 0):
+            raise WizCoinException(f'customer {customer_id} can\'t hold more than {MAX_KNUTS} knuts')
+
+    def _check_funds(self, customer_id, knuts):
+        if self.balances.get(customer_id, 0) < knuts:
+            raise WizCoinException(f'customer {customer_id} has {self.balances.get(customer_id, 0)} knuts, '
+                                   f'not the {knuts} needed')
+
+    def deposit(self, customer_id, amount):
+        """Adds a WizCoin or int of knuts to a customer's purse. Returns the
+        record's sequence number."""
+        knuts = amount_in_knuts(amount)
+        self._check_customer(customer_id)
+        self._check_room(customer_id, knuts)
+        return self._append(DEPOSIT, customer_id, 0, knuts)
+
+    def withdraw(self, customer_id, amount):
+        """Takes an amount out of a customer's purse, raising
+        WizCoinException (and recording nothing) if there isn't enough."""
+        knuts = amount_in_knuts(amount)
+        self._check_customer(customer_id)
+        self._check_funds(customer_id, knuts)  # Also keeps `knuts` within MAX_KNUTS.
+        return self._append(WITHDRAW, customer_id, 0, knuts)
+
+    def transfer(self, from_id, to_id, amount):
+        """Moves an amount from one customer's purse to another's, as one
+        record."""
+        knuts = amount_in_knuts(amount)
+        if from_id == to_id:
+            raise WizCoinException(f'customer {from_id} can\'t transfer to themselves')
+        self._check_customer(from_id)
+        self._check_customer(to_id)
+        self._check_funds(from_id, knuts)
+        self._check_room(to_id, knuts)
+        return self._append(TRANSFER, from_id, to_id, knuts)
+
+    def commit(self):
+        """Flushes the records written since the last commit to disk."""
+        if self.committed_sequence == self.last_sequence:
+            return
+        start = self._offset(self.committed_sequence + 1)
+        start -= start % mmap.ALLOCATIONGRANULARITY  # flush() needs an aligned offset.
+        self._map.flush(start, self._offset(self.last_sequence + 1) - start)
+        self.committed_sequence = self.last_sequence
+
+    def snapshot(self):
+        """Commits, then saves every balance so that reopening the journal
+        only replays the records after this one."""
+        self.commit()
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'wb') as snapshot_file:
+            snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, VERSION, self.last_sequence, len(self.balances)))
+            snapshot_file.write(b''.join(SNAPSHOT_ENTRY.pack(customer_id, knuts)
+                                         for customer_id, knuts in self.balances.items()))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, self.snapshot_path)  # The old snapshot stays whole until this point.
+        self.snapshot_sequence = self.last_sequence
+
+    def close(self):
+        if self._map.closed:
+            return
+        self.commit()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _time_journal(customers=1000, seed=0):
+    """Prints append throughput for several group sizes, and how long
+    reopening takes for several journal lengths with and without a
+    snapshot near the end."""
+    rng = random.Random(seed)
+
+    def fill(journal, count):
+        for customer_id in range(customers):
+            journal.deposit(customer_id, 1_000_000)
+        for i in range(count - customers):
+            kind = i % 3
+            if kind == 0:
+                journal.deposit(rng.randrange(customers), rng.randrange(1, 500))
+            elif kind == 1:
+                journal.withdraw(rng.randrange(customers), 1)
+            else:
+                from_id = rng.randrange(customers)
+                journal.transfer(from_id, (from_id + rng.randrange(1, customers)) % customers, 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print('Sustained appends:')
+        for group_size, count in ((1, 5_000), (16, 50_000), (256, 200_000), (4096, 200_000)):
+            path = os.path.join(directory, f'appends{group_size}.journal')
+            with PurseJournal(path, group_size, snapshot_interval=None) as journal:
+                start_time = time.perf_counter()
+                fill(journal, count)
+                journal.commit()
+                seconds = time.perf_counter() - start_time
+            print(f'  group size {group_size:5}: {count / seconds:10,.0f} records/sec')
+        print('Recovery on open:')
+        for count in (10_000, 100_000, 1_000_000):
+            path = os.path.join(directory, f'recover{count}.journal')
+            with PurseJournal(path, snapshot_interval=None) as journal:
+                fill(journal, count)
+            start_time = time.perf_counter()
+            with PurseJournal(path, snapshot_interval=None) as journal:
+                full_seconds = time.perf_counter() - start_time
+                replayed = journal.replayed
+                journal.snapshot()
+                fill(journal, 1000 + customers)  # A tail after the snapshot.
+            start_time = time.perf_counter()
+            with PurseJournal(path, snapshot_interval=None) as journal:
+                tail_seconds = time.perf_counter() - start_time
+                tail = journal.replayed
+            print(f'  {count:9,} records: full replay of {replayed:,} in {full_seconds * 1000:8.1f} ms, '
+                  f'snapshot + {tail:,}-record tail in {tail_seconds * 1000:6.1f} ms')
+
+
+if __name__ == '__main__':
+    _time_journal()
@@ -0,0 +1,272 @@
+"""Streaming reads and writes of ledgers: long lists of (galleons, sickles,
+knuts) purses, as CSV text or in a fixed-width binary format.
+
+LedgerReader reads either kind of file a chunk of rows at a time, so memory
+use stays the same however long the ledger is. Each chunk is checked at
+once with NumPy: every denomination must be a whole number from 0 to
+MAX_COINS. Bad rows are left out and collected in bulk instead of stopping
+the import at the first one.
+
+A binary ledger is a 16-byte header followed by one row of three
+little-endian int64s (24 bytes) per purse. LedgerWriter writes them, and
+load_ledger() memory-maps one so that the WizCoinArray it returns reads
+straight from the file without copying it.
+
+    python wizcoin_ledger.py ledger.csv ledger.wzl   Convert a CSV ledger."""
+import argparse
+import collections
+import csv
+import itertools
+import struct
+import time
+
+import numpy as np
+
+from wizcoin import WizCoinException
+from wizcoin_array import MAX_COINS, WizCoinArray
+
+MAGIC = b'WZLG'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xQ')  # Magic, version, number of rows.
+ROW_DTYPE = np.dtype('<i8')  # Each row is three of these: galleons, sickles, knuts.
+ROW_SIZE = 3 * ROW_DTYPE.itemsize
+CHUNK_SIZE = 65536  # Rows per chunk.
+MAX_BAD_ROWS = 1000  # Bad rows kept for reporting; all of them are counted.
+DENOMINATIONS = ('galleons', 'sickles', 'knuts')
+
+BadRow = collections.namedtuple('BadRow', 'row_number values reason')
+
+
+class LedgerError(WizCoinException):
+    """Raised for ledger files that are damaged or aren't ledgers."""
+    pass
+
+
+def _check_values(values):
+    """Returns {row index: reason} for the bad rows of an (N, 3) int64
+    array. Only the bad rows are looked at one by one."""
+    bad = (values < 0) | (values > MAX_COINS)
+    reasons = {}
+    for row_index in np.flatnonzero(bad.any(axis=1)).tolist():
+        for column, name in enumerate(DENOMINATIONS):
+            if bad[row_index, column]:
+                reasons[row_index] = f'{name} must be from 0 to {MAX_COINS}, not {values[row_index, column]}'
+                break
+    return reasons
+
+
+def _parse_rows(rows):
+    """Turns a list of CSV rows into an (N, 3) int64 array, returning it
+    with {row index: reason} for the bad rows."""
+    try:
+        return _parse_good_rows(rows)
+    except (ValueError, OverflowError):
+        pass  # Some row is bad; go through them one at a time to find out which.
+    values = np.zeros((len(rows), 3), dtype=np.int64)
+    reasons = {}
+    for row_index, row in enumerate(rows):
+        if len(row) != 3:
+            reasons[row_index] = f'expected 3 values, not {len(row)}'
+            continue
+        for column, (name, field) in enumerate(zip(DENOMINATIONS, row)):
+            try:
+                number = int(field)
+            except ValueError:
+                reasons[row_index] = f'{name} must be a whole number, not {field!r}'
+                break
+            if not 0 <= number <= MAX_COINS:
+                reasons[row_index] = f'{name} must be from 0 to {MAX_COINS}, not {number}'
+                break
+            values[row_index, column] = number
+    return values, reasons
+
+
+def _parse_good_rows(rows):
+    """The fast path of _parse_rows(), for chunks where every row is a
+    well-formed row of three whole numbers. Raises ValueError otherwise."""
+    if any(len(row) != 3 for row in rows):
+        raise ValueError('a row does not have 3 values')
+    values = np.array(rows, dtype=str).astype(np.int64)
+    return values, _check_values(values)
+
+
+def _read_header(header_bytes, path):
+    """Returns the row count from a binary ledger's header."""
+    if len(header_bytes) < HEADER.size:
+        raise LedgerError(f'{path} is too short to be a ledger.')
+    magic, version, row_count = HEADER.unpack_from(header_bytes)
+    if magic != MAGIC:
+        raise LedgerError(f'{path} is not a binary ledger.')
+    if version != VERSION:
+        raise LedgerError(f'{path} is version {version}; this module reads version {VERSION}.')
+    return row_count
+
+
+def _map_rows(path):
+    """Returns a read-only (N, 3) array mapped from a binary ledger."""
+    with open(path, 'rb') as ledger_file:
+        row_count = _read_header(ledger_file.read(HEADER.size), path)
+        ledger_file.seek(0, 2)
+        if ledger_file.tell() < HEADER.size + row_count * ROW_SIZE:
+            raise LedgerError(f'{path} should have {row_count} rows but is cut short.')
+        if row_count == 0:
+            return np.zeros((0, 3), dtype=ROW_DTYPE)  # An empty file section can't be mapped.
+        return np.memmap(ledger_file, dtype=ROW_DTYPE, mode='r', offset=HEADER.size, shape=(row_count, 3))
+
+
+def _is_binary_ledger(path):
+    with open(path, 'rb') as ledger_file:
+        return ledger_file.read(len(MAGIC)) == MAGIC
+
+
+def _purses_from_values(values, copy=True):
+    """Returns a WizCoinArray of an (N, 3) array of checked rows."""
+    return WizCoinArray(values[:, 0], values[:, 1], values[:, 2], copy=copy)
+
+
+class LedgerReader:
+    """Reads a CSV or binary ledger in chunks, leaving out and recording
+    bad rows. A CSV ledger may start with a galleons,sickles,knuts header
+    row. Row numbers count from 1 and don't include that header."""
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, max_bad_rows=MAX_BAD_ROWS):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_bad_rows = max_bad_rows
+        self.rows_read = 0
+        self.bad_row_count = 0
+        self.bad_rows = []  # The first max_bad_rows BadRows.
+
+    def _keep_good_rows(self, first_row_number, values, reasons, rows=None):
+        """Records the bad rows of a chunk and returns the good values.
+        `rows` are the rows as read, if they aren't the values themselves."""
+        self.rows_read += len(values)
+        if not reasons:
+            return values
+        bad_indexes = sorted(reasons)
+        self.bad_row_count += len(bad_indexes)
+        for row_index in bad_indexes[:max(0, self.max_bad_rows - len(self.bad_rows))]:
+            row = rows[row_index] if rows is not None else values[row_index].tolist()
+            self.bad_rows.append(BadRow(first_row_number + row_index, tuple(row), reasons[row_index]))
+        return np.delete(values, bad_indexes, axis=0)
+
+    def chunks(self):
+        """Yields a WizCoinArray of the good rows of each chunk. Chunks of a
+        binary ledger without bad rows read straight from the file."""
+        if _is_binary_ledger(self.path):
+            rows = _map_rows(self.path)
+            for start in range(0, len(rows), self.chunk_size):
+                values = rows[start:start + self.chunk_size]
+                yield _purses_from_values(self._keep_good_rows(start + 1, values, _check_values(values)), copy=False)
+            return
+        with open(self.path, newline='') as ledger_file:
+            reader = csv.reader(ledger_file)
+            first_row = next(reader, None)
+            if first_row is None:
+                return
+            if [field.strip().lower() for field in first_row] != list(DENOMINATIONS):
+                reader = itertools.chain([first_row], reader)  # There was no header row.
+            row_number = 1
+            while True:
+                rows = list(itertools.islice(reader, self.chunk_size))
+                if not rows:
+                    return
+                values, reasons = _parse_rows(rows)
+                yield _purses_from_values(self._keep_good_rows(row_number, values, reasons, rows), copy=False)
+                row_number += len(rows)
+
+    def purses(self):
+        """Yields a WizCoin for each good row."""
+        for chunk in self.chunks():
+            yield from chunk
+
+    def report(self):
+        """Returns a few lines of text about the rows read so far."""
+        lines = [f'{self.rows_read:,} rows read, {self.bad_row_count:,} bad.']
+        for bad_row in self.bad_rows:
+            lines.append(f'  row {bad_row.row_number}: {bad_row.reason}')
+        if self.bad_row_count > len(self.bad_rows):
+            lines.append(f'  ...and {self.bad_row_count - len(self.bad_rows):,} more.')
+        return '\n'.join(lines)
+
+
+class LedgerWriter:
+    """Writes purses to a binary ledger. The row count in the header is
+    filled in when the writer is closed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.row_count = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0))
+
+    def write(self, purses):
+        """Appends a WizCoinArray or a list of WizCoins. Raises
+        WizCoinException, writing nothing, if any denomination is out of
+        range."""
+        if not isinstance(purses, WizCoinArray):
+            purses = WizCoinArray.from_coins(purses)
+        values = np.column_stack([purses.galleons, purses.sickles, purses.knuts]).astype(ROW_DTYPE)
+        reasons = _check_values(values)
+        if reasons:
+            row_index = min(reasons)
+            raise WizCoinException(f'purse {row_index}: {reasons[row_index]}')
+        self._file.write(values.tobytes())
+        self.row_count += len(values)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.row_count))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_ledger(path, purses):
+    """Writes a WizCoinArray or list of WizCoins to a binary ledger."""
+    with LedgerWriter(path) as writer:
+        writer.write(purses)
+
+
+def load_ledger(path):
+    """Returns a WizCoinArray of a whole binary ledger, read through a
+    memory map. Raises LedgerError if it holds any bad rows."""
+    rows = _map_rows(path)
+    reasons = _check_values(rows)
+    if reasons:
+        row_index = min(reasons)
+        raise LedgerError(f'{path} row {row_index + 1}: {reasons[row_index]}')
+    return _purses_from_values(rows, copy=False)
+
+
+def main():
+    """Converts a CSV ledger to a binary ledger from the command line."""
+    parser = argparse.ArgumentParser(description='Convert a CSV ledger of purses to a binary ledger.')
+    parser.add_argument('csv_path', help='rows of galleons,sickles,knuts')
+    parser.add_argument('ledger_path', help='the binary ledger to write')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+    reader = LedgerReader(args.csv_path, args.chunk_size)
+    with LedgerWriter(args.ledger_path) as writer:
+        for chunk in reader.chunks():
+            writer.write(chunk)
+    seconds = time.perf_counter() - start_time
+    print(reader.report())
+    print(f'Wrote {writer.row_count:,} purses in {seconds:.2f} seconds '
+          f'({reader.rows_read / max(seconds, 1e-9):,.0f} rows/sec).')
+    start_time = time.perf_counter()
+    purses = load_ledger(args.ledger_path)
+    total = int(purses.total.sum())
+    print(f'Reloaded {len(purses):,} purses worth {total:,} knuts in {time.perf_counter() - start_time:.3f} seconds.')
+
+
+# If this program was run (instead of imported), run the conversion:
+if __name__ == '__main__':
+    main()
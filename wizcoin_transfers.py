@@ -0,0 +1,190 @@
+"""Thread-safe transfers between the purses of WizardCustomers (from
+composition_over_inheritance.py).
+
+PurseBank guards the purses with a fixed set of striped locks: customer id
+c is guarded by lock c % stripes, so threads moving coins between
+unrelated customers rarely wait for each other, without needing a lock per
+customer. A transfer takes the locks of both customers in order of stripe
+number (which for ids below the number of stripes is the order of the ids),
+so two threads can never each hold the lock the other is waiting for.
+transfer_batch() takes the locks for a whole batch at once, each of them
+only once, and applies the batch all or nothing.
+
+Purses are never changed in place: a transfer puts new WizCoins, in the
+fewest coins, into both customers' purse attributes while holding their
+locks, so other threads always see a whole purse.
+
+    python wizcoin_transfers.py    Show transfers/sec by threads and skew."""
+import argparse
+import random
+import threading
+import time
+
+from composition_over_inheritance import WizardCustomer
+from wizcoin import WizCoin, WizCoinException
+from wizcoin_journal import amount_in_knuts
+
+STRIPES = 64
+
+
+class PurseBank:
+    """WizardCustomers by customer id, with atomic transfers between their
+    purses. `stripes` is the number of locks; 1 makes it one global lock."""
+
+    def __init__(self, stripes=STRIPES):
+        self.customers = {}  # Customer id -> WizardCustomer.
+        self._locks = [threading.Lock() for i in range(stripes)]
+
+    def add_customer(self, customer_id, customer):
+        """Adds a WizardCustomer under an int id. Their purse is left as it
+        is."""
+        with self._locks[customer_id % len(self._locks)]:
+            if customer_id in self.customers:
+                raise WizCoinException(f'there is already a customer {customer_id}')
+            self.customers[customer_id] = customer
+
+    def _stripes_for(self, customer_ids):
+        """Returns the locks for these customers, each once, in the order
+        they must be taken."""
+        return [self._locks[stripe] for stripe in sorted({customer_id % len(self._locks)
+                                                          for customer_id in customer_ids})]
+
+    def _customer(self, customer_id):
+        try:
+            return self.customers[customer_id]
+        except KeyError:
+            raise WizCoinException(f'there is no customer {customer_id}') from None
+
+    def transfer(self, from_id, to_id, amount):
+        """Moves an amount (a WizCoin or int of knuts) from one customer's
+        purse to another's. Raises WizCoinException, changing nothing, if
+        the first customer hasn't got enough."""
+        knuts = amount_in_knuts(amount)
+        if from_id == to_id:
+            raise WizCoinException(f'customer {from_id} can\'t transfer to themselves')
+        from_customer, to_customer = self._customer(from_id), self._customer(to_id)
+        locks = self._stripes_for((from_id, to_id))
+        for lock in locks:
+            lock.acquire()
+        try:
+            if from_customer.purse.total < knuts:
+                raise WizCoinException(f'customer {from_id} has {from_customer.purse.total} knuts, '
+                                       f'not the {knuts} needed')
+            from_customer.purse = from_customer.purse - knuts
+            to_customer.purse = to_customer.purse + knuts
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def transfer_batch(self, transfers):
+        """Makes a list of (from_id, to_id, amount) transfers in order,
+        taking each lock they need once for the whole batch. If any of them
+        can't be made, raises WizCoinException and makes none of them."""
+        transfers = [(from_id, to_id, amount_in_knuts(amount)) for from_id, to_id, amount in transfers]
+        customer_ids = set()
+        for from_id, to_id, knuts in transfers:
+            if from_id == to_id:
+                raise WizCoinException(f'customer {from_id} can\'t transfer to themselves')
+            customer_ids.update((from_id, to_id))
+        customers = {customer_id: self._customer(customer_id) for customer_id in customer_ids}
+        locks = self._stripes_for(customer_ids)
+        for lock in locks:
+            lock.acquire()
+        try:
+            # Work out every new balance first, so a failure changes nothing:
+            balances = {customer_id: customer.purse.total for customer_id, customer in customers.items()}
+            for transfer_number, (from_id, to_id, knuts) in enumerate(transfers):
+                if balances[from_id] < knuts:
+                    raise WizCoinException(f'transfer {transfer_number}: customer {from_id} has '
+                                           f'{balances[from_id]} knuts, not the {knuts} needed')
+                balances[from_id] -= knuts
+                balances[to_id] += knuts
+            for customer_id, knuts in balances.items():
+                if knuts != customers[customer_id].purse.total:
+                    customers[customer_id].purse = WizCoin.from_knuts(knuts)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def total_knuts(self):
+        """Returns the value of every purse in the bank, taken while holding
+        every lock, so it is never caught in the middle of a transfer."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            return sum(customer.purse.total for customer in self.customers.values())
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+def _pick_customers(rng, customers, skew):
+    """Returns two different customer ids. With probability `skew` one of
+    them is the hot account, customer 0."""
+    from_id = 0 if rng.random() < skew else rng.randrange(customers)
+    to_id = rng.randrange(customers - 1)
+    if to_id >= from_id:
+        to_id += 1
+    if rng.random() < 0.5:
+        return from_id, to_id
+    return to_id, from_id
+
+
+def run_contention(threads, skew, stripes=STRIPES, batch_size=1, customers=1000, seconds=0.5, seed=0):
+    """Runs `threads` threads making transfers of 1 knut for `seconds`
+    seconds, and returns the transfers made per second. Checks that no
+    coins were made or lost."""
+    bank = PurseBank(stripes)
+    for customer_id in range(customers):
+        customer = WizardCustomer(f'customer {customer_id}')
+        customer.purse = WizCoin(1_000_000, 0, 0)
+        bank.add_customer(customer_id, customer)
+    total_before = bank.total_knuts()
+    counts = [0] * threads
+    stop = threading.Event()
+    start = threading.Barrier(threads + 1)
+
+    def worker(thread_number):
+        rng = random.Random(seed * 1000 + thread_number)
+        start.wait()
+        while not stop.is_set():
+            if batch_size == 1:
+                bank.transfer(*_pick_customers(rng, customers, skew), 1)
+            else:
+                bank.transfer_batch([(*_pick_customers(rng, customers, skew), 1) for i in range(batch_size)])
+            counts[thread_number] += batch_size
+
+    workers = [threading.Thread(target=worker, args=(thread_number,)) for thread_number in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    start_time = time.perf_counter()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+    assert bank.total_knuts() == total_before, 'coins were made or lost'
+    return sum(counts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure transfers/sec between purses under contention.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--skew', type=float, nargs='+', default=[0.0, 0.5, 0.9],
+                        help='fractions of transfers that involve one hot account')
+    parser.add_argument('--seconds', type=float, default=0.5, help='seconds per measurement')
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+    print(f"{'threads':>7} {'skew':>5} {'global lock':>12} {f'{STRIPES} stripes':>12} "
+          f"{f'batches of {args.batch_size}':>15}   (transfers/sec)")
+    for threads in args.threads:
+        for skew in args.skew:
+            rates = [run_contention(threads, skew, 1, seconds=args.seconds),
+                     run_contention(threads, skew, STRIPES, seconds=args.seconds),
+                     run_contention(threads, skew, STRIPES, args.batch_size, seconds=args.seconds)]
+            print(f'{threads:7} {skew:5.2f} {rates[0]:12,.0f} {rates[1]:12,.0f} {rates[2]:15,.0f}')
+
+
+if __name__ == '__main__':
+    main()